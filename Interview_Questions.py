@@ -1,17 +1,9 @@
 import os
 import io
 import logging
-import tempfile
 import streamlit as st
 from zipfile import ZipFile
 
-from langchain.document_loaders import PDFPlumberLoader
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-)
-
 from config import (
     PAGE_TITLE,
     PAGE_ICON,
@@ -20,6 +12,12 @@ from config import (
     PROMPTS_MAPPING,
     MODEL_QUESTIONS,
 )
+from pdf_extract import extract_pdf_text
+from question_prompts import build_questions_messages
+from llm_client import get_chat_model
+from metrics import start_metrics_server
+from tokens import count_tokens
+from usage import record_usage, track_usage
 
 openai_api_key = st.secrets["OPENAI_API_KEY"]
 
@@ -27,25 +25,14 @@ openai_api_key = st.secrets["OPENAI_API_KEY"]
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+start_metrics_server()
+
 
-@st.cache_data
 def ingest_pdf(resume_file_buffer):
     print("Loading resume...")
     try:
-        # Create a temporary file manually
-        temp_file_path = tempfile.mktemp(suffix=".pdf")
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(resume_file_buffer.read())
-
-        # Use the temporary file path
-        loader = PDFPlumberLoader(temp_file_path)
-        documents = loader.load()
-        resume_text = " ".join(document.page_content for document in documents)
+        resume_text = extract_pdf_text(resume_file_buffer)
         print("Resume loaded successfully.")
-
-        # Delete the temporary file
-        os.remove(temp_file_path)
-
         return resume_text
     except Exception as e:
         logger.error(f"An error occurred while loading the resume: {e}")
@@ -69,61 +56,36 @@ def get_parameters(
 
 
 # TODO: Switch to OpenAI function LLM call for more reliable response formatting - not an issue for now
-@st.cache_data
-def get_questions(
-    resume_text,
-    job_description,
-):
-    print("Getting score...")
-    llm = ChatOpenAI(
-        model=MODEL_QUESTIONS,
-        temperature=0.0,
-        openai_api_key=openai_api_key,
+def stream_questions(resume_text, job_description, placeholder):
+    # Render tokens as they arrive instead of waiting for the full response
+    llm = get_chat_model(MODEL_QUESTIONS, openai_api_key)
+    messages = build_questions_messages(resume_text, job_description)
+    questions = ""
+    for chunk in llm.stream(messages):
+        questions += chunk.content
+        placeholder.markdown(questions + "▌")
+    placeholder.markdown(questions)
+    # Streamed replies carry no usage, so count the tokens ourselves
+    record_usage(
+        MODEL_QUESTIONS,
+        count_tokens(messages[0].content, MODEL_QUESTIONS),
+        count_tokens(questions, MODEL_QUESTIONS),
     )
+    return questions
 
-    template = f"""\
-You are an Industrial/Organizational Psychologist who is preparing to analyze an applicant based on a job description and resume, 
-and create a selection of interview questions specific to the applicant in order to determine their potential success in the role.
-
-Applicant Resume:
------------------
-{resume_text}
------------------
-
-Job Key Areas of Responsibility:
------------------
-{job_description}
------------------
-
-Based on the job description and the information provided in the resume, please respond with an analysis of this applicant and a 
-selection of interview questions specific to this applicant and designed to understand better if this person will succeed in this role.
 
-Your Response Format:
-Applicant Name
-
-List of positive attributes for the position
-
-List of negative attributes for the position
-
-List of questions for the interview
-    """
-
-    user_prompt = HumanMessagePromptTemplate.from_template(template=template)
-    chat_prompt = ChatPromptTemplate.from_messages([user_prompt])
-    formatted_prompt = chat_prompt.format_prompt(
-        resume_text=resume_text,
-        job_description=job_description,
-    ).to_messages()
-    # print(formatted_prompt)
-    llm = llm
-    result = llm(formatted_prompt)
-    return result.content
+def save_questions_zip(generated_questions):
+    zip_buffer = io.BytesIO()
+    with ZipFile(zip_buffer, "w") as main_zip:
+        for applicant_name, questions in generated_questions:
+            main_zip.writestr(f"{applicant_name}_questions.txt", questions)
+    return zip_buffer.getvalue()
 
 
 def parse_input(file, text_input_key):
     if file:
-        resume_file_buffer = io.BytesIO(file.getbuffer())
-        return ingest_pdf(resume_file_buffer)
+        # Uploaded files are already in-memory streams; parse them in place
+        return ingest_pdf(file)
     else:
         return st.session_state[text_input_key]
 
@@ -157,6 +119,10 @@ def select_job():
 
 selected_job = select_job()
 
+job_description_input = ""
+if selected_job == "Input your own":
+    job_description_input = st.text_area("Job description")
+
 uploaded_resumes = st.file_uploader(
     "Upload Resumes (PDF files)", type=["pdf"], accept_multiple_files=True
 )
@@ -164,15 +130,30 @@ uploaded_resumes = st.file_uploader(
 start_button = st.button("Generate Questions")
 
 if uploaded_resumes and start_button:
-    try:
-        zip_data, categorization_results = process_resumes(uploaded_resumes)
-        if zip_data:
-            st.download_button(
-                label="✨ Download Scores ✨",
-                data=zip_data,
-                file_name="scores.zip",
-                mime="application/zip",
-            )
-    except Exception as e:
-        st.error(f"An error occurred during processing: {e}")
-        logger.error(f"An error occurred during processing: {e}")
+    job_description = get_parameters(selected_job, job_description_input, "", "")
+    generated_questions = []
+    with track_usage(job=selected_job) as usage:
+        for resume_file in uploaded_resumes:
+            applicant_name = os.path.splitext(resume_file.name)[0]
+            st.subheader(applicant_name)
+            try:
+                resume_text = ingest_pdf(resume_file)
+                questions = stream_questions(resume_text, job_description, st.empty())
+                generated_questions.append((applicant_name, questions))
+            except Exception as e:
+                st.error(f"An error occurred while processing {resume_file.name}: {e}")
+                logger.error(
+                    f"An error occurred while processing {resume_file.name}: {e}"
+                )
+    totals = usage.to_dict()
+    st.caption(
+        f"LLM usage: {totals['calls']} calls, {totals['total_tokens']:,} tokens "
+        f"(~${totals['cost']:.2f})"
+    )
+    if generated_questions:
+        st.download_button(
+            label="✨ Download Questions ✨",
+            data=save_questions_zip(generated_questions),
+            file_name="questions.zip",
+            mime="application/zip",
+        )
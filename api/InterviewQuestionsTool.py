@@ -1,26 +1,30 @@
 import os
 import io
+import json
+import asyncio
 import logging
-import tempfile
 import fastapi
 import uvicorn
 from zipfile import ZipFile
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi import FastAPI, File, UploadFile
 
-from langchain.document_loaders import PDFPlumberLoader
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-)
-
 from api_config import (
     PROMPTS_MAPPING,
     MODEL_QUESTIONS,
+    EXTRACT_THREADS,
 )
+from pdf_extract import extract_pdf_text_pooled
+from question_prompts import build_questions_messages
+from rate_limiter import get_rate_limit_stats
+from metrics import metrics_response
+from tokens import count_tokens
+from usage import record_usage, track_usage
+from llm_retry import acall_llm, get_retry_stats
+from llm_client import get_chat_model, get_connection_stats
 
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -32,23 +36,19 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def ingest_pdf(resume_file_buffer):
+# Bounds how many uploads are extracted at once; parsing itself runs on the
+# shared process pool, so the event loop never blocks on pdfplumber
+extract_executor = ThreadPoolExecutor(max_workers=EXTRACT_THREADS)
+
+
+async def ingest_pdf(resume_bytes):
     print("Loading resume...")
     try:
-        # Create a temporary file manually
-        temp_file_path = tempfile.mktemp(suffix=".pdf")
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(resume_file_buffer.read())
-
-        # Use the temporary file path
-        loader = PDFPlumberLoader(temp_file_path)
-        documents = loader.load()
-        resume_text = " ".join(document.page_content for document in documents)
+        loop = asyncio.get_running_loop()
+        resume_text = await loop.run_in_executor(
+            extract_executor, extract_pdf_text_pooled, resume_bytes
+        )
         print("Resume loaded successfully.")
-
-        # Delete the temporary file
-        os.remove(temp_file_path)
-
         return resume_text
     except Exception as e:
         logger.error(f"An error occurred while loading the resume: {e}")
@@ -69,106 +69,24 @@ def get_parameters(selected_job, job_description_input):
 
 
 # TODO: Switch to OpenAI function LLM call for more reliable response formatting - not an issue for now
-def get_questions(
+async def get_questions(
     resume_text,
     job_description,
 ):
     print("Getting score...")
-    llm = ChatOpenAI(
-        model="gpt-3.5-turbo-16k",
-        temperature=0.0,
-        openai_api_key=openai_api_key,
-    )
-
-    template = f"""\
-You are an Industrial/Organizational Psychologist who is preparing to analyze an applicant based on a job description and resume, 
-and create a selection of interview questions specific to the applicant in order to determine their potential success in the role.
-
-Applicant Resume:
------------------
-{resume_text}
------------------
+    llm = get_chat_model("gpt-3.5-turbo-16k", openai_api_key)
 
-Job Key Areas of Responsibility:
------------------
-{job_description}
------------------
-
-Based on the job description and the information provided in the resume, please respond with an analysis of this applicant and a 
-selection of interview questions specific to this applicant and designed to understand better if this person will succeed in this role.
-
-Your Response Format:
-Applicant Name
-
-List of positive attributes for the position
-
-List of negative attributes for the position
-
-List of questions for the interview
-    """
-
-    user_prompt = HumanMessagePromptTemplate.from_template(template=template)
-    chat_prompt = ChatPromptTemplate.from_messages([user_prompt])
-    formatted_prompt = chat_prompt.format_prompt(
-        resume_text=resume_text,
-        job_description=job_description,
-    ).to_messages()
+    formatted_prompt = build_questions_messages(resume_text, job_description)
     # print(formatted_prompt)
-    llm = llm
-    result = llm(formatted_prompt)
-    return result.content
-
-
-def parse_input(file):
-    if file:
-        resume_file_buffer = io.BytesIO(file.getbuffer())
-        return ingest_pdf(resume_file_buffer)
-
-
-def select_job():
-    if "selected_job" not in st.session_state:
-        st.session_state.selected_job = "CEMM - Senior CPG Account Strategist"
-    st.session_state.selected_job = st.selectbox(
-        "Select an open position or add your own",
-        (
-            "CEMM - Senior CPG Account Strategist",
-            "CEMM - Advertising Assistant",
-            "Input your own",
-        ),
-        index=0,
-        key="job_selection",
-    )
-    return st.session_state.selected_job
-
-
-selected_job = select_job()
-
-uploaded_resumes = st.file_uploader(
-    "Upload Resumes (PDF files)", type=["pdf"], accept_multiple_files=True
-)
-
-start_button = st.button("Generate Questions")
-
-if uploaded_resumes and start_button:
-    try:
-        zip_data, categorization_results = process_resumes(uploaded_resumes)
-        if zip_data:
-            st.download_button(
-                label="✨ Download Scores ✨",
-                data=zip_data,
-                file_name="scores.zip",
-                mime="application/zip",
-            )
-    except Exception as e:
-        st.error(f"An error occurred during processing: {e}")
-        logger.error(f"An error occurred during processing: {e}")
+    # Async client call: other requests keep being served while this one waits
+    return await acall_llm(llm, formatted_prompt)
 
 
 @app.post("/upload/")
 async def upload_file(file: UploadFile = File(...)):
-    resume_file_buffer = io.BytesIO(file.file.read())
-    resume_text = ingest_pdf(resume_file_buffer)
-    return {"filename": file.filename}
+    resume_bytes = await file.read()
+    resume_text = await ingest_pdf(resume_bytes)
+    return {"filename": file.filename, "resume_text": resume_text}
 
 
 @app.post("/generate_questions/")
@@ -176,5 +94,60 @@ async def generate_questions(
     resume_text: str, selected_job: str, job_description_input: str = None
 ):
     job_description = get_parameters(selected_job, job_description_input)
-    questions = get_questions(resume_text, job_description)
-    return {"questions": questions}
+    with track_usage(job=selected_job) as usage:
+        questions = await get_questions(resume_text, job_description)
+    return {"questions": questions, "usage": usage.to_dict()}
+
+
+async def stream_questions(resume_text, job_description, selected_job):
+    # Server-sent events: one `data:` line per token delta, then a `done` event.
+    # Errors after the first byte can't change the status code, so they are sent
+    # as an `error` event instead
+    llm = get_chat_model("gpt-3.5-turbo-16k", openai_api_key)
+    messages = build_questions_messages(resume_text, job_description)
+    questions = ""
+    try:
+        async for chunk in llm.astream(messages):
+            if chunk.content:
+                questions += chunk.content
+                yield f"data: {json.dumps({'delta': chunk.content})}\n\n"
+    except Exception as e:
+        logger.error(f"An error occurred while streaming questions: {e}")
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        return
+    # Streamed replies carry no usage, so count the tokens ourselves
+    with track_usage(job=selected_job) as usage:
+        record_usage(
+            llm.model_name,
+            count_tokens(messages[0].content, llm.model_name),
+            count_tokens(questions, llm.model_name),
+        )
+    yield f"event: done\ndata: {json.dumps({'usage': usage.to_dict()})}\n\n"
+
+
+@app.post("/generate_questions/stream")
+async def generate_questions_stream(
+    resume_text: str, selected_job: str, job_description_input: str = None
+):
+    job_description = get_parameters(selected_job, job_description_input)
+    return StreamingResponse(
+        stream_questions(resume_text, job_description, selected_job),
+        media_type="text/event-stream",
+        # Keep reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "llm_connections": get_connection_stats(),
+        "rate_limits": get_rate_limit_stats(),
+        "llm_retries": get_retry_stats(),
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    body, content_type = metrics_response()
+    return Response(body, media_type=content_type)
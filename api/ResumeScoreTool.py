@@ -1,451 +1,441 @@
 import os
-import io
+import uuid
+import time
+import shutil
 import logging
 import tempfile
-import streamlit as st
-from zipfile import ZipFile
-
-from langchain.document_loaders import PDFPlumberLoader
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-)
+import threading
+from functools import partial
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse, Response
 
 from config import (
-    PAGE_TITLE,
-    PAGE_ICON,
-    SUB_TITLE,
-    LAYOUT,
     PROMPTS_MAPPING,
-    MODEL,
+    NEAR_DUPLICATE_REUSE,
+    MAX_IN_FLIGHT,
+    API_BATCH_WORKERS,
+    API_JOB_DIR,
+    API_JOB_RETENTION_HOURS,
+    API_MAX_ZIP_MEMBERS,
+    API_MAX_ZIP_BYTES,
+)
+from rate_limiter import get_rate_limit_stats
+from metrics import metrics_response, track_stage
+from llm_retry import get_retry_stats
+from llm_client import get_connection_stats
+from pdf_extract import extract_pdf_texts
+from scoring import (
+    get_cached_score,
+    parse_score_and_explanation,
+    categorize_score,
+    score_resumes_deduplicated,
+    estimate_batch_usage,
+    check_prompt_fits,
+    score_or_error,
 )
+from usage import collect_usage, track_usage, usage_csv, with_usage
 
-openai_api_key = st.secrets["OPENAI_API_KEY"]
+load_dotenv()
+openai_api_key = os.getenv("OPENAI_API_KEY")
+
+app = FastAPI()
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-
-@st.cache_data
-def ingest_pdf(resume_file_buffer):
-    print("Loading resume...")
-    try:
-        # Create a temporary file manually
-        temp_file_path = tempfile.mktemp(suffix=".pdf")
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(resume_file_buffer.read())
-
-        # Use the temporary file path
-        loader = PDFPlumberLoader(temp_file_path)
-        documents = loader.load()
-        resume_text = " ".join(document.page_content for document in documents)
-        print("Resume loaded successfully.")
-
-        # Delete the temporary file
-        os.remove(temp_file_path)
-
-        return resume_text
-    except Exception as e:
-        logger.error(f"An error occurred while loading the resume: {e}")
-        st.error(f"An error occurred while loading the resume: {e}")
-        raise
-
-
-def save_to_category_buffer(
-    category, applicant_name, resume_bytes, response_content, main_zip
-):
-    # Add the PDF file
-    main_zip.writestr(f"{category}/{applicant_name}/{applicant_name}.pdf", resume_bytes)
-
-    # Add the response text
-    main_zip.writestr(
-        f"{category}/{applicant_name}/{applicant_name}_response.txt",
-        response_content,
+# Batches run here, never on the request that submitted them
+batch_executor = ThreadPoolExecutor(max_workers=API_BATCH_WORKERS)
+
+jobs = {}
+jobs_lock = threading.Lock()
+
+
+class ScoringJob:
+    def __init__(
+        self,
+        job_id,
+        directory,
+        resume_names,
+        upload_names,
+        selected_job,
+        job_description,
+        high_fit_resume,
+        low_fit_resume,
+        best_select,
+        good_select,
+        reuse_near_duplicates=NEAR_DUPLICATE_REUSE,
+    ):
+        self.job_id = job_id
+        self.directory = directory
+        self.resume_names = resume_names
+        self.upload_names = upload_names
+        self.selected_job = selected_job
+        self.job_description = job_description
+        self.high_fit_resume = high_fit_resume
+        self.low_fit_resume = low_fit_resume
+        self.best_select = best_select
+        self.good_select = good_select
+        self.reuse_near_duplicates = reuse_near_duplicates
+        self.status = "queued"
+        self.completed = 0
+        self.results = []
+        self.error = None
+        self.zip_path = None
+        self.estimate = None
+        self.usage = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "completed": self.completed,
+                "total": len(self.resume_names),
+                "results": list(self.results),
+                "error": self.error,
+                "estimate": self.estimate,
+                "usage": self.usage,
+                "download_url": (
+                    f"/jobs/{self.job_id}/download"
+                    if self.status == "completed"
+                    else None
+                ),
+            }
+
+
+def get_parameters(selected_job, job_description_input):
+    if selected_job == "Input your own":
+        return job_description_input, "", ""
+    if selected_job not in PROMPTS_MAPPING:
+        raise HTTPException(status_code=400, detail=f"Unknown job: {selected_job}")
+    selected_prompts = PROMPTS_MAPPING[selected_job]
+    job_description = (
+        job_description_input
+        if job_description_input
+        else selected_prompts["job_description"]
+    )
+    return (
+        job_description,
+        selected_prompts["high_fit_resume"],
+        selected_prompts["low_fit_resume"],
     )
 
 
-def get_parameters(
-    selected_job, job_description_input, high_fit_resume_input, low_fit_resume_input
+def save_to_category_buffer(
+    category, applicant_name, resume_path, response_content, main_zip
 ):
-    if selected_job == "Input your own":
-        job_description = job_description_input
-        high_fit_resume = high_fit_resume_input
-        low_fit_resume = low_fit_resume_input
-    else:
-        selected_prompts = PROMPTS_MAPPING[selected_job]
-        job_description = (
-            job_description_input
-            if job_description_input
-            else selected_prompts["job_description"]
-        )
-        high_fit_resume = (
-            high_fit_resume_input
-            if high_fit_resume_input
-            else selected_prompts["high_fit_resume"]
-        )
-        low_fit_resume = (
-            low_fit_resume_input
-            if low_fit_resume_input
-            else selected_prompts["low_fit_resume"]
+    with track_stage("zip_write"):
+        # Add the PDF file; PDFs are already compressed, so store them as-is
+        main_zip.write(
+            resume_path,
+            f"{category}/{applicant_name}/{applicant_name}.pdf",
+            compress_type=ZIP_STORED,
         )
-    return job_description, high_fit_resume, low_fit_resume
 
-
-# TODO: Switch to OpenAI function LLM call for more reliable response formatting - not an issue for now
-@st.cache_data
-def get_score(
-    resume_text,
-    job_description,
-    high_fit_resume,
-    low_fit_resume,
-):
-    print("Getting score...")
-    llm = ChatOpenAI(
-        model=MODEL,
-        temperature=0.0,
-        openai_api_key=openai_api_key,
-    )
-    # Step 1: Check for high fit resume
-    if high_fit_resume:
-        example_high_fit = (
-            "Example 'high-fit' resume with a score of 0.99 for reference:"
+        # Add the response text
+        main_zip.writestr(
+            f"{category}/{applicant_name}/{applicant_name}_response.txt",
+            response_content,
         )
-        h_div = "-----------------"
-    else:
-        example_high_fit = ""
-        h_div = ""
-        high_fit_resume = ""
-
-    # Step 2: Check for low fit resume
-    if low_fit_resume:
-        example_low_fit = "Example 'low-fit' resume with a score of 0.10 for reference:"
-        l_div = "-----------------"
-    else:
-        example_low_fit = ""
-        l_div = ""
-        low_fit_resume = ""
-
-    template = f"""\
-You are an Industrial-Organizational Psychologist who specializes in personnel selection and assessment. 
-Your discipline of study, Industrial-Organizational Psychology, would best prepare you to answer the 
-question or perform the task of determining a job fit score based on a resume and a job description. 
-
-You will review the following resume and job description and determine a job fit score as a float between 0 and 1 (Example: 0.75) and a short explanation for the score.
-
-Applicant Resume:
------------------
-{resume_text}
------------------
-
-Job Key Areas of Responsibility:
------------------
-{job_description}
------------------
-
-{example_high_fit}
-{h_div}
-{high_fit_resume}
-{h_div}
-
-{example_low_fit}
-{l_div}
-{low_fit_resume}
-{l_div}
-
-Remember, your task is to determine a job fit score as a float between 0 and 1 (Example: 0.99) and a short explanation for score.
-Respond with only the score and explanation. Do not include the resume or job description in your response.
-
-RESPONSE FORMAT:
-Job Fit Score: 
-Explanation:
-
-Job Fit Score:
-    """
-
-    user_prompt = HumanMessagePromptTemplate.from_template(template=template)
-    chat_prompt = ChatPromptTemplate.from_messages([user_prompt])
-    formatted_prompt = chat_prompt.format_prompt(
-        resume_text=resume_text,
-        job_description=job_description,
-        high_fit_resume=high_fit_resume,
-        low_fit_resume=low_fit_resume,
-        l_div=l_div,
-        h_div=h_div,
-    ).to_messages()
-    # print(formatted_prompt)
-    llm = llm
-    result = llm(formatted_prompt)
-    return result.content
-
-
-def parse_score_and_explanation(result_content):
-    # Assuming the score and explanation are on separate lines
-    lines = result_content.split("\n")
-    score = float(lines[0])  # Assuming the score is on the first line
-    explanation = lines[1] if len(lines) > 1 else ""  # Explanation on the second line
-    return score, explanation
-
-
-def categorize_score(score, threshold1, threshold2):
-    if score > threshold1:
-        return "best"
-    elif score > threshold2:
-        return "good"
-    else:
-        return "rest"
-
-
-def parse_resume_bytes(resume_bytes):
-    resume_file_buffer = io.BytesIO(resume_bytes)
-    resume_text = ingest_pdf(resume_file_buffer)
-    return resume_text
-
-
-def parse_input(file, text_input_key):
-    if file:
-        resume_file_buffer = io.BytesIO(file.getbuffer())
-        return ingest_pdf(resume_file_buffer)
-    else:
-        return st.session_state[text_input_key]
-
-
-def process_resumes(uploaded_resumes):
-    # Define the input variables here based on the selected job
-    job_description_input = st.session_state.job_description_input
-    high_fit_resume_input = st.session_state.high_fit_resume_input
-    low_fit_resume_input = st.session_state.low_fit_resume_input
-
-    # Create a dictionary to store the categorization results
-    categorization_results = {"best": [], "good": [], "rest": []}
-
-    # Parse the custom user input
-    job_description = parse_input(job_description_file, "job_description_input")
-    high_fit_resume = parse_input(high_fit_resume_file, "high_fit_resume_input")
-    low_fit_resume = parse_input(low_fit_resume_file, "low_fit_resume_input")
-
-    # Get the values for job_description, high_fit_resume, and low_fit_resume
-    job_description, high_fit_resume, low_fit_resume = get_parameters(
-        selected_job, job_description_input, high_fit_resume_input, low_fit_resume_input
-    )
-
-    zip_buffer = io.BytesIO()
-    try:
-        with ZipFile(zip_buffer, "a") as main_zip:
-            for i, resume_file in enumerate(uploaded_resumes):
-                # User stopping mechanism
-                if st.session_state.stop_button_clicked:
-                    st.session_state.status_text = "Process stopped by user."
-                    break
-
-                # Update progress
-                st.session_state.status_text = (
-                    f"Processing resume {i + 1}/{len(uploaded_resumes)}..."
-                )
-
-                # Read and parse resume bytes
-                resume_bytes = resume_file.getbuffer()
-                resume_text = parse_resume_bytes(resume_bytes)
-
-                # Get score for the resume
-                result_content = get_score(
-                    resume_text, job_description, high_fit_resume, low_fit_resume
-                )
-                score, _ = parse_score_and_explanation(result_content)
 
-                # Categorize the score
-                category = categorize_score(score, best_select, good_select)
-
-                # Save the resume to the appropriate category buffer
-                applicant_name = os.path.splitext(resume_file.name)[0]
-                categorization_results[category].append(applicant_name)
 
+def unique_name(file_name, taken):
+    # "cv.pdf", then "cv-1.pdf", "cv-2.pdf", ... for later uploads of the same name.
+    # Compared by lowercased stem: the stem names the applicant's folder in the
+    # results ZIP, and "cv.pdf" and "cv.PDF" are one file on some filesystems.
+    stem, extension = os.path.splitext(file_name)
+    name_stem = stem
+    suffix = 0
+    while name_stem.lower() in taken:
+        suffix += 1
+        name_stem = f"{stem}-{suffix}"
+    taken.add(name_stem.lower())
+    return f"{name_stem}{extension}"
+
+
+def save_uploads(files, directory):
+    # Uploads (and PDFs inside uploaded ZIPs) are written to the job's folder so a
+    # batch never has to be held in memory. Returns the names they were saved
+    # under, unique within the job, and the names they were uploaded as.
+    resume_names = []
+    upload_names = []
+    taken = set()
+
+    def save(source, upload_name):
+        resume_name = unique_name(os.path.basename(upload_name), taken)
+        with open(os.path.join(directory, resume_name), "wb") as target:
+            shutil.copyfileobj(source, target)
+        resume_names.append(resume_name)
+        upload_names.append(upload_name)
+
+    # Caps on what uploaded ZIPs may expand to; zipfile never reads past a
+    # member's declared size, so the declared sizes are what get extracted
+    zip_members = 0
+    zip_bytes = 0
+    for file in files:
+        file_name = os.path.basename(file.filename or "")
+        if file_name.lower().endswith(".zip"):
+            with ZipFile(file.file) as upload_zip:
+                for member in upload_zip.infolist():
+                    if member.is_dir() or not member.filename.lower().endswith(".pdf"):
+                        continue
+                    zip_members += 1
+                    zip_bytes += member.file_size
+                    if zip_members > API_MAX_ZIP_MEMBERS:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Uploaded ZIPs hold more than "
+                            f"{API_MAX_ZIP_MEMBERS} PDFs",
+                        )
+                    if zip_bytes > API_MAX_ZIP_BYTES:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Uploaded ZIPs expand to more than "
+                            f"{API_MAX_ZIP_BYTES} bytes",
+                        )
+                    with upload_zip.open(member) as source:
+                        save(source, member.filename)
+        elif file_name.lower().endswith(".pdf"):
+            save(file.file, file_name)
+    return resume_names, upload_names
+
+
+def run_scoring_job(job):
+    with job.lock:
+        job.status = "running"
+    try:
+        resume_paths = [
+            os.path.join(job.directory, resume_name)
+            for resume_name in job.resume_names
+        ]
+        resume_texts = extract_pdf_texts(resume_paths, return_exceptions=True)
+        scored_indices = [
+            i
+            for i, resume_text in enumerate(resume_texts)
+            if not isinstance(resume_text, Exception)
+        ]
+        extract_errors = {
+            i: resume_text
+            for i, resume_text in enumerate(resume_texts)
+            if isinstance(resume_text, Exception)
+        }
+
+        def update_progress(completed, total):
+            with job.lock:
+                job.completed = len(extract_errors) + completed
+
+        texts_to_score = [resume_texts[i] for i in scored_indices]
+        estimate = estimate_batch_usage(
+            texts_to_score,
+            job.job_description,
+            job.high_fit_resume,
+            job.low_fit_resume,
+        ).to_dict()
+        with job.lock:
+            job.estimate = estimate
+
+        score_fn = with_usage(
+            partial(
+                score_or_error,
+                get_cached_score,
+                job_description=job.job_description,
+                high_fit_resume=job.high_fit_resume,
+                low_fit_resume=job.low_fit_resume,
+                openai_api_key=openai_api_key,
+                reuse_near_duplicates=job.reuse_near_duplicates,
+            )
+        )
+        usage_by_position = {}
+        zip_path = os.path.join(job.directory, "scores.zip")
+        with track_usage(job=job.selected_job) as batch_usage, ZipFile(
+            zip_path, "w", compression=ZIP_DEFLATED
+        ) as main_zip:
+            for i, error in extract_errors.items():
+                record_result(job, i, error=f"Could not read PDF: {error}")
+            for position, result_content in collect_usage(
+                score_resumes_deduplicated(
+                    texts_to_score,
+                    score_fn,
+                    MAX_IN_FLIGHT,
+                    on_progress=update_progress,
+                ),
+                usage_by_position,
+            ):
+                i = scored_indices[position]
+                usage = usage_by_position[position].to_dict()
+                if isinstance(result_content, Exception):
+                    record_result(job, i, error=str(result_content), usage=usage)
+                    continue
+                try:
+                    score, explanation = parse_score_and_explanation(result_content)
+                except ValueError as e:
+                    record_result(
+                        job, i, error=f"Unreadable response: {e}", usage=usage
+                    )
+                    continue
+                category = categorize_score(score, job.best_select, job.good_select)
+                applicant_name = os.path.splitext(job.resume_names[i])[0]
                 save_to_category_buffer(
-                    category, applicant_name, resume_bytes, result_content, main_zip
+                    category, applicant_name, resume_paths[i], result_content, main_zip
                 )
+                record_result(job, i, score, explanation, category, usage=usage)
+
+            main_zip.writestr(
+                "usage.csv",
+                usage_csv(
+                    job.resume_names,
+                    {
+                        scored_indices[position]: usage
+                        for position, usage in usage_by_position.items()
+                    },
+                    batch_usage,
+                ),
+            )
 
-                # Update progress bar
-                st.session_state.progress = (i + 1) / len(uploaded_resumes)
-                progress_bar.progress(int(st.session_state.progress * 100))
-
-        return zip_buffer.getvalue(), categorization_results
-
+        with job.lock:
+            job.usage = batch_usage.to_dict()
+            job.zip_path = zip_path
+            job.completed = len(job.resume_names)
+            job.status = "completed"
     except Exception as e:
-        st.error(f"An error occurred: {e}")
-        logger.error(f"An error occurred: {e}")
-
-
-# Streamlit interface
-st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON, layout=LAYOUT)
-
-st.markdown(
-    f"<h1 style='text-align: center;'>{PAGE_TITLE} {PAGE_ICON} <br> {SUB_TITLE}</h1>",
-    unsafe_allow_html=True,
-)
-
-st.divider()
-
-# Initialize session state variables
-if "stop_button_clicked" not in st.session_state:
-    st.session_state.stop_button_clicked = False
-if "status_text" not in st.session_state:
-    st.session_state.status_text = ""
-if "progress" not in st.session_state:
-    st.session_state.progress = 0
-if "processing" not in st.session_state:
-    st.session_state.processing = False
-if "job_description_input" not in st.session_state:
-    st.session_state.job_description_input = ""
-if "high_fit_resume_input" not in st.session_state:
-    st.session_state.high_fit_resume_input = ""
-if "low_fit_resume_input" not in st.session_state:
-    st.session_state.low_fit_resume_input = ""
-
-
-def select_job():
-    if "selected_job" not in st.session_state:
-        st.session_state.selected_job = "CEMM - Senior CPG Account Strategist"
-    st.session_state.selected_job = st.selectbox(
-        "Select an open position or add your own",
-        (
-            "CEMM - Senior CPG Account Strategist",
-            "CEMM - Advertising Assistant",
-            "Input your own",
-        ),
-        index=0,
-        key="job_selection",
-    )
-    return st.session_state.selected_job
+        logger.error(f"Scoring job {job.job_id} failed: {e}")
+        with job.lock:
+            job.status = "failed"
+            job.error = str(e)
+    finally:
+        with job.lock:
+            job.finished_at = time.time()
 
 
-selected_job = select_job()
-
-# Initialize the variables outside the conditional block
-job_description_file = None
-high_fit_resume_file = None
-low_fit_resume_file = None
-
-if selected_job == "Input your own":
-    with st.expander("Custom Input", expanded=True):
-        st.text_area(
-            "Job Description Text",
-            placeholder="""Summary of Position:
-This in-house position is crucial for supporting our client's ...
-            """,
-            key="job_description_input",
-        )
-        job_description_file = st.file_uploader("Or upload a PDF", type=["pdf"])
-
-        have_resume_examples = st.checkbox(
-            "I have good and/or bad resume examples",
-            help="Adding examples of good and bad resumes can increase scoring accuracy",
-            key="have_resume",
+def record_result(
+    job, i, score=None, explanation=None, category=None, error=None, usage=None
+):
+    with job.lock:
+        job.results.append(
+            {
+                "resume": job.resume_names[i],
+                "uploaded_as": job.upload_names[i],
+                "score": score,
+                "category": category,
+                "explanation": explanation,
+                "error": error,
+                "usage": usage,
+            }
         )
-        if have_resume_examples:
-            high_fit_resume_file = st.file_uploader(
-                "Upload High-Fit Resume Example (optional)", type=["pdf"]
-            )
-            is_high_text = st.checkbox("Enter as text", key="is_high_text")
-            if is_high_text:
-                st.text_area("High-Fit Text", key="high_fit_resume_input")
-
-            low_fit_resume_file = st.file_uploader(
-                "Upload Low-Fit Resume Example (optional)", type=["pdf"]
-            )
-            is_low_text = st.checkbox("Enter as text", key="is_low_text")
-            if is_low_text:
-                st.text_area("Low-Fit Text)", key="low_fit_resume_input")
-
 
-uploaded_resumes = st.file_uploader(
-    "Upload Resumes (PDF files)", type=["pdf"], accept_multiple_files=True
-)
 
-if uploaded_resumes:
-    best_select = st.slider(
-        "Select a 'best' score threshold",
-        0.0,
-        1.0,
-        0.8,
-        help="Default is 0.8. The lower the threshold, the more resumes will be categorized as 'best'.",
-    )
-    good_select = st.slider(
-        "Select a 'good' score threshold",
-        0.0,
-        1.0,
-        0.6,
-        help="Default is 0.6. The lower the threshold, the more resumes will be categorized as 'good'.",
+def remove_expired_jobs():
+    cutoff = time.time() - API_JOB_RETENTION_HOURS * 60 * 60
+    with jobs_lock:
+        expired = [
+            job
+            for job in jobs.values()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job in expired:
+            del jobs[job.job_id]
+    for job in expired:
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+
+def get_job(job_id):
+    with jobs_lock:
+        job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+def create_job(
+    files: List[UploadFile] = File(...),
+    selected_job: str = Form(...),
+    job_description_input: str = Form(None),
+    best_select: float = Form(0.8),
+    good_select: float = Form(0.6),
+    reuse_near_duplicates: bool = Form(NEAR_DUPLICATE_REUSE),
+):
+    # Plain `def` so FastAPI saves the uploads on its threadpool, not the event loop
+    remove_expired_jobs()
+    job_description, high_fit_resume, low_fit_resume = get_parameters(
+        selected_job, job_description_input
     )
+    if not job_description:
+        raise HTTPException(status_code=400, detail="A job description is required")
+    try:
+        check_prompt_fits(job_description, high_fit_resume, low_fit_resume)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-
-start_button = st.button("Start Scoring Resumes")
-
-
-status_text = st.empty()
-status_text.text(st.session_state.status_text)  # Status text now updates dynamically
-
-if start_button:
-    st.session_state.stop_button_clicked = False
-    st.session_state.processing = True
-    st.session_state.progress = 0
-
-
-# Display the stop button only when processing is True
-if st.session_state.processing:
-    # Update progress bar and status text from session state
-    progress_bar = st.progress(0)
-    progress_bar.progress(int(st.session_state.progress * 100))
-#    if uploaded_resumes:
-#        stop_button = st.button("Stop Process")
-#        if stop_button:
-#            st.session_state.stop_button_clicked = True
-#            st.session_state.status_text = "Stopping the process..."
-#            st.session_state.processing = False
-
-if uploaded_resumes and start_button:
-    st.session_state.status_text = "Starting the process..."
+    os.makedirs(API_JOB_DIR, exist_ok=True)
+    directory = tempfile.mkdtemp(prefix="job_", dir=API_JOB_DIR)
     try:
-        zip_data, categorization_results = process_resumes(uploaded_resumes)
-        if zip_data:
-            st.download_button(
-                label="✨ Download Scores ✨",
-                data=zip_data,
-                file_name="scores.zip",
-                mime="application/zip",
-            )
-            # Displaying the results
-            st.markdown("##### Categorized:")
-            for category, resumes in categorization_results.items():
-                st.write(f"{category.capitalize()}: {len(resumes)}")
+        resume_names, upload_names = save_uploads(files, directory)
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    if not resume_names:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise HTTPException(status_code=400, detail="No PDF resumes were uploaded")
+
+    job = ScoringJob(
+        uuid.uuid4().hex,
+        directory,
+        resume_names,
+        upload_names,
+        selected_job,
+        job_description,
+        high_fit_resume,
+        low_fit_resume,
+        best_select,
+        good_select,
+        reuse_near_duplicates,
+    )
+    with jobs_lock:
+        jobs[job.job_id] = job
+    batch_executor.submit(run_scoring_job, job)
+    return {"job_id": job.job_id, "status_url": f"/jobs/{job.job_id}"}
 
-            st.markdown("##### Your 'best' applicants:")
-            st.write(", ".join(categorization_results["best"]))
-    except Exception as e:
-        st.error(f"An error occurred during processing: {e}")
-        logger.error(f"An error occurred during processing: {e}")
-    st.session_state.status_text = "Process completed. Download the scores below."
-    st.session_state.processing = False
-else:
-    if start_button:
-        st.warning("Please upload resumes before starting the process.")
 
+@app.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    return get_job(job_id).to_dict()
 
-with st.expander("🤔 How to Use"):
-    st.info(
-        f"""
-This tool 🛠️ uses the OpenAI API 🧠 to score (with an explanation) and categorize resumes based on a job description Then provides a downloadable file with the original resumes in their respective categories.
 
-1️⃣) Select a job description from the dropdown menu or input your own ✏️.
+@app.get("/jobs/{job_id}/download")
+def download_job(job_id: str):
+    job = get_job(job_id)
+    with job.lock:
+        status, zip_path = job.status, job.zip_path
+    if status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {status}")
+    return FileResponse(zip_path, media_type="application/zip", filename="scores.zip")
 
-1️⃣ .5) If you input your own job description, you can also upload a PDF or enter text examples of a high-fit ✅ and low-fit ❌ resume to the specified job description. This will increase the accuracy 🎯 of the scoring.
 
-2️⃣) Upload resumes to score and categorize 📑. You can upload multiple resumes at once.
+@app.get("/stats")
+def get_stats():
+    return {
+        "llm_connections": get_connection_stats(),
+        "rate_limits": get_rate_limit_stats(),
+        "llm_retries": get_retry_stats(),
+    }
 
-3️⃣) Click the "Start Scoring Resumes" button.
 
-4️⃣) Once the process is complete, a download button will appear to export the scores and categorized resumes 📥.
+@app.get("/metrics")
+def get_metrics():
+    body, content_type = metrics_response()
+    return Response(body, media_type=content_type)
 
-📌Note: The OpenAI models do make mistakes 😅 and the results may not be perfect ✨. If you have any questions or feedback, please reach out to me on [Twitter](https://twitter.com/Kirby_).
-            """
-    )
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
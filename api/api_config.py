@@ -26,6 +26,9 @@ FOOTER = """
 MODEL = "gpt-3.5-turbo-16k"
 MODEL_QUESTIONS = "gpt-4"
 
+# API
+EXTRACT_THREADS = 8  # Uploads extracted concurrently per worker process
+
 # Prompt Config
 PROMPTS_MAPPING = {
     "CEMM - Senior CPG Account Strategist": {
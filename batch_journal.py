@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from config import (
+    JOURNAL_DIR,
+    JOURNAL_MAX_AGE_DAYS,
+    MODEL,
+    PROMPT_VERSION,
+    CASCADE_MODEL,
+    CASCADE_MARGIN,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def digest_pdf(pdf_bytes):
+    return hashlib.blake2b(pdf_bytes, digest_size=20).hexdigest()
+
+
+def make_batch_id(
+    resume_digests, job_description, high_fit_resume, low_fit_resume, settings
+):
+    # The same uploads scored against the same job with the same settings map to
+    # the same journal, so a restarted batch picks up where the previous run
+    # stopped. `settings` holds every UI option that changes a score (prefilter
+    # floor, cascade, packing, near-duplicate reuse); changing one starts afresh.
+    digest = hashlib.blake2b(digest_size=16)
+    settings = dict(
+        settings,
+        model=MODEL,
+        prompt_version=PROMPT_VERSION,
+        cascade_model=CASCADE_MODEL,
+        cascade_margin=CASCADE_MARGIN,
+    )
+    for part in [
+        json.dumps(settings, sort_keys=True),
+        job_description,
+        high_fit_resume,
+        low_fit_resume,
+    ]:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    for resume_digest in resume_digests:
+        digest.update(resume_digest.encode("ascii"))
+    return digest.hexdigest()
+
+
+class BatchJournal:
+    # Append-only JSONL log of finished resumes. Each line is flushed and fsynced
+    # before the next resume is handled, so a crash loses at most the line in flight.
+    def __init__(self, batch_id, directory=JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{batch_id}.jsonl")
+        self._lock = threading.Lock()
+        remove_old_journals(directory)
+
+    def load(self):
+        # Returns {digest: record} for every resume already finished in this batch
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    continue
+                records[record["digest"]] = record
+        return records
+
+    def append(self, digest, name, score, explanation, category, result_content):
+        line = json.dumps(
+            {
+                "digest": digest,
+                "name": name,
+                "score": score,
+                "explanation": explanation,
+                "category": category,
+                "result_content": result_content,
+                "recorded_at": time.time(),
+            }
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as journal_file:
+                journal_file.write(line + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+    def discard(self):
+        # A finished batch has nothing left to resume; a re-run scores afresh
+        # (cache hits aside) instead of replaying this journal
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def remove_old_journals(directory=JOURNAL_DIR, max_age_days=JOURNAL_MAX_AGE_DAYS):
+    cutoff = time.time() - max_age_days * 24 * 60 * 60
+    for file_name in os.listdir(directory):
+        path = os.path.join(directory, file_name)
+        if file_name.endswith(".jsonl") and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            logger.info(f"Removed old batch journal {path}")
@@ -1,3 +1,5 @@
+import os
+
 from prompts.cpg_strategic import (
     CPG_STRATEGIC_JOB_DESCRIPTION,
     CPG_STRATEGIC_HIGH_FIT_RESUME,
@@ -25,6 +27,102 @@ FOOTER = """
 # LLM
 MODEL = "gpt-3.5-turbo-16k"
 MODEL_QUESTIONS = "gpt-4"
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-4": 8192,
+}
+MODEL_PRICES = {  # USD per 1K (prompt, completion) tokens
+    "gpt-3.5-turbo-16k": (0.003, 0.004),
+    "gpt-4": (0.03, 0.06),
+}
+
+# LLM HTTP Client
+LLM_MAX_CONNECTIONS = 64  # Shared by every scoring and interview question call
+LLM_MAX_KEEPALIVE_CONNECTIONS = 32
+LLM_KEEPALIVE_EXPIRY = 90  # Seconds an idle connection is kept open
+LLM_CONNECT_TIMEOUT = 10
+LLM_TIMEOUT = 180
+LLM_BASE_URL = os.getenv("OPENAI_BASE_URL")  # e.g. other_tools/mock_llm_server.py for benchmarks
+
+# LLM Retries
+LLM_CALL_TIMEOUT = 120  # Seconds one attempt may take before it is abandoned and retried
+LLM_MAX_RETRIES = 3  # Retries for timeouts, connection errors, 429s and 5xx
+LLM_RETRY_BASE_DELAY = 1.0  # Backoff ceiling doubles from here per retry, with full jitter
+LLM_RETRY_MAX_DELAY = 30.0
+LLM_HEDGING = False  # Send a duplicate request when a call outlives the model's p95 latency
+LLM_HEDGE_PERCENTILE = 0.95
+LLM_HEDGE_MIN_SAMPLES = 20  # Latencies seen before hedging starts
+LLM_LATENCY_WINDOW = 200  # Recent latencies the percentile is taken over
+
+# Rate Limits
+RATE_LIMITS = {}  # {model: {"requests_per_minute": n, "tokens_per_minute": n}}; learned from response headers when unset
+RATE_LIMIT_MAX_RETRIES = 5  # 429 responses retried after Retry-After before the error reaches the caller
+RATE_LIMIT_MIN_CONCURRENCY = 1
+RATE_LIMIT_MAX_CONCURRENCY = LLM_MAX_CONNECTIONS  # Per model; shrinks on 429 and grows back while under quota
+RATE_LIMIT_HEADROOM = 0.1  # Concurrency only grows while this share of the minute's quota is left
+
+# Scoring
+MAX_IN_FLIGHT = 8  # Max concurrent LLM scoring calls per batch
+PROMPT_VERSION = "2"  # Bump when the scoring prompt changes to invalidate cached scores
+CASCADE_SCORING = False  # Re-score borderline resumes with CASCADE_MODEL by default
+CASCADE_MODEL = MODEL_QUESTIONS
+CASCADE_MARGIN = 0.05  # Scores this close to a threshold are re-scored
+SCORE_COMPLETION_TOKENS = 256  # Completion tokens reserved for a single score
+PACKED_SCORING = False  # Score several resumes per LLM call by default
+PACKED_MAX_RESUMES = 5  # Upper bound on resumes per packed call
+PACKED_TOKENS_PER_RESULT = 120  # Completion tokens reserved per packed result
+
+# Keyword Prefilter
+PREFILTER_MIN_SIMILARITY = 0.0  # TF-IDF similarity floor for an LLM call; 0.0 disables
+
+# Oversized Resumes
+SUMMARY_CHUNK_TOKENS = 3000  # Resume chunk size for map-reduce summarization
+SUMMARY_MAX_ROUNDS = 3  # Reduce rounds before falling back to truncation
+SUMMARY_WORKERS = 4  # Concurrent chunk summaries per resume
+
+# PDF Extraction
+EXTRACT_WORKERS = None  # Processes used to extract batches of PDFs; None uses every core
+EXTRACTOR_VERSION = "1"  # Bump when extraction changes to invalidate cached text
+
+# Metrics
+METRICS_PORT = int(os.getenv("RECRUITPILOT_METRICS_PORT", "9100"))  # Prometheus sidecar for the Streamlit apps
+
+# Local State
+CACHE_DIR = os.getenv("RECRUITPILOT_CACHE_DIR", ".cache")
+
+# Text Cache
+TEXT_CACHE_PATH = os.path.join(CACHE_DIR, "texts.sqlite3")
+TEXT_CACHE_MAX_ENTRIES = 100000
+TEXT_CACHE_MAX_AGE_DAYS = 90
+
+# Batch Journal
+JOURNAL_DIR = os.path.join(CACHE_DIR, "journals")
+JOURNAL_MAX_AGE_DAYS = 14
+
+# Results Downloads
+DOWNLOAD_DIR = os.path.join(CACHE_DIR, "downloads")
+DOWNLOAD_MAX_AGE_HOURS = 24  # Prepared ZIPs of abandoned sessions are removed after this
+
+# Scoring API
+API_BATCH_WORKERS = 2  # Batches scored at the same time by the API service
+API_JOB_DIR = os.path.join(CACHE_DIR, "api_jobs")
+API_JOB_RETENTION_HOURS = 24  # Finished jobs and their files are kept this long
+API_MAX_ZIP_MEMBERS = 5000  # PDFs accepted from the uploaded ZIPs of one job
+API_MAX_ZIP_BYTES = 2 * 1024**3  # Uncompressed size accepted from the uploaded ZIPs of one job
+
+# Score Cache
+SCORE_CACHE_PATH = os.path.join(CACHE_DIR, "scores.sqlite3")
+SCORE_CACHE_MAX_ENTRIES = 50000
+SCORE_CACHE_MAX_AGE_DAYS = 90
+
+# Near-Duplicate Resumes
+NEAR_DUPLICATE_REUSE = False  # Reuse the score of a near-identical resume already scored for the same job by default
+NEAR_DUPLICATE_MIN_SIMILARITY = 0.9  # Estimated Jaccard similarity of word 5-shingles needed to reuse a score
+NEAR_DUPLICATE_PERMUTATIONS = 128  # MinHash signature length; changing it invalidates the index
+NEAR_DUPLICATE_BANDS = 16  # LSH bands of PERMUTATIONS / BANDS rows; pairs above ~0.7 similarity become candidates
+NEAR_DUPLICATE_INDEX_PATH = os.path.join(CACHE_DIR, "near_duplicates.sqlite3")
+NEAR_DUPLICATE_MAX_ENTRIES = 50000
+NEAR_DUPLICATE_MAX_AGE_DAYS = 90
 
 # Prompt Config
 PROMPTS_MAPPING = {
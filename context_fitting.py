@@ -0,0 +1,98 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+
+from config import (
+    MODEL,
+    SCORE_COMPLETION_TOKENS,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAX_ROUNDS,
+    SUMMARY_WORKERS,
+)
+from llm_client import get_chat_model
+from llm_retry import call_llm
+from usage import submit_in_context
+from tokens import (
+    count_tokens,
+    get_context_window,
+    split_by_tokens,
+    truncate_to_tokens,
+)
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_TEMPLATE = """\
+The following is part of an applicant's resume. Condense it for a recruiter who will judge the applicant's fit for a role.
+Keep every job title, employer, date range, degree, certification, skill and quantified achievement. Drop filler, formatting and repetition.
+Respond with only the condensed resume text.
+
+Resume Section:
+-----------------
+{resume_chunk}
+-----------------
+"""
+
+
+def get_resume_budget(prompt, model=MODEL):
+    # Tokens left for the resume once the static prompt and the answer are accounted
+    # for. No room at all is a configuration problem, not something to summarize away.
+    context_window = get_context_window(model)
+    budget = context_window - prompt.static_tokens - SCORE_COMPLETION_TOKENS
+    if budget <= 0:
+        raise ValueError(
+            f"The job description and examples exceed the {model} context: "
+            f"{prompt.static_tokens} prompt tokens plus {SCORE_COMPLETION_TOKENS} "
+            f"for the answer leave no room for a resume in its "
+            f"{context_window}-token window"
+        )
+    return budget
+
+
+def summarize_chunk(resume_chunk, openai_api_key, model=MODEL):
+    llm = get_chat_model(model, openai_api_key)
+    message = HumanMessage(content=SUMMARY_TEMPLATE.format(resume_chunk=resume_chunk))
+    return call_llm(llm, [message])
+
+
+def summarize_resume(resume_text, max_tokens, openai_api_key, model=MODEL):
+    # Map: condense each chunk independently. Reduce: join the condensed chunks and
+    # repeat until the resume fits, truncating as a last resort.
+    chunk_tokens = min(SUMMARY_CHUNK_TOKENS, get_context_window(model) // 2)
+    for round_number in range(1, SUMMARY_MAX_ROUNDS + 1):
+        chunks = split_by_tokens(resume_text, chunk_tokens, model)
+        with ThreadPoolExecutor(max_workers=SUMMARY_WORKERS) as executor:
+            futures = [
+                submit_in_context(
+                    executor, summarize_chunk, chunk, openai_api_key, model
+                )
+                for chunk in chunks
+            ]
+            summaries = [future.result() for future in futures]
+        resume_text = "\n".join(summaries)
+        resume_tokens = count_tokens(resume_text, model)
+        logger.info(
+            f"Summarization round {round_number}: {len(chunks)} chunks -> "
+            f"{resume_tokens} tokens (budget {max_tokens})"
+        )
+        if resume_tokens <= max_tokens:
+            return resume_text
+
+    logger.warning("Resume still over budget after summarizing; truncating")
+    return truncate_to_tokens(resume_text, max_tokens, model)
+
+
+def fit_resume_to_budget(resume_text, prompt, openai_api_key, model=MODEL):
+    # Measure the resume against what the model has room for, and only pay for
+    # summarization when it would not fit
+    resume_tokens = count_tokens(resume_text, model)
+    budget = get_resume_budget(prompt, model)
+    logger.info(
+        f"Resume is {resume_tokens} tokens; prompt total "
+        f"{prompt.static_tokens + resume_tokens} of {get_context_window(model)}"
+    )
+    if resume_tokens <= budget:
+        return resume_text
+
+    logger.info(f"Resume exceeds budget of {budget} tokens; summarizing")
+    return summarize_resume(resume_text, budget, openai_api_key, model)
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import CACHE_LOOKUPS
+
+# Run eviction once every this many writes instead of on every insert
+EVICT_EVERY = 100
+
+
+class DiskCache:
+    # A small SQLite key/value store with age- and size-based eviction. Safe to
+    # share between threads; every access goes through self._lock.
+    def __init__(self, path, table, max_entries, max_age_days):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key, count=True):
+        # `count=False` for a repeat lookup, so one request isn't counted twice
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is None or now - row[1] > self.max_age_seconds:
+                if count:
+                    self.misses += 1
+                    CACHE_LOOKUPS.labels(self.table, "miss").inc()
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            if count:
+                self.hits += 1
+                CACHE_LOOKUPS.labels(self.table, "hit").inc()
+            return row[0]
+
+    def put(self, key, value):
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            should_evict = self._writes % EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        # Drop expired entries first, then the least recently used beyond the cap
+        with self._lock:
+            cutoff = time.time() - self.max_age_seconds
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (cutoff,)
+            )
+            self._conn.execute(
+                f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
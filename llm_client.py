@@ -0,0 +1,189 @@
+import time
+import asyncio
+import threading
+from contextvars import ContextVar
+from functools import lru_cache
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from config import (
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_CONNECT_TIMEOUT,
+    LLM_TIMEOUT,
+    LLM_BASE_URL,
+    RATE_LIMIT_MAX_RETRIES,
+)
+from rate_limiter import estimate_request, get_rate_limiter
+
+
+class ConnectionStats:
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def snapshot(self):
+        with self._lock:
+            requests, connections_opened = self.requests, self.connections_opened
+        reused = max(requests - connections_opened, 0)
+        return {
+            "requests": requests,
+            "connections_opened": connections_opened,
+            "connections_reused": reused,
+            "reuse_ratio": reused / requests if requests else 0.0,
+        }
+
+
+connection_stats = ConnectionStats()
+
+
+class AttemptAbandoned(Exception):
+    pass
+
+
+class AttemptState:
+    # One llm_retry attempt as the transport sees it: when its request last went
+    # out (None while it waits on the rate limiter) and whether the caller has
+    # stopped waiting for it
+    def __init__(self):
+        self.sent_at = None
+        self.abandoned = False
+
+
+# Set by llm_retry in the thread running an attempt
+current_attempt = ContextVar("current_attempt", default=None)
+
+
+def _trace(event_name, info):
+    # httpcore reports a completed TCP connect only when a new connection is opened
+    if event_name == "connection.connect_tcp.complete":
+        connection_stats.record_connection()
+
+
+async def _async_trace(event_name, info):
+    _trace(event_name, info)
+
+
+def _rate_limit_target(request):
+    # Only chat completion bodies name a model; anything else passes straight through
+    try:
+        model, tokens = estimate_request(request.content)
+    except httpx.RequestNotRead:
+        return None, 0
+    if model is None:
+        return None, 0
+    return get_rate_limiter(model), tokens
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    # Waits for the model's rate limiter before sending and retries 429s after
+    # their Retry-After, so throttling slows a batch down instead of failing it.
+    # Requests of an llm_retry attempt the caller has given up on are not sent.
+    def handle_request(self, request):
+        rate_limiter, tokens = _rate_limit_target(request)
+        attempt_state = current_attempt.get()
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            if rate_limiter:
+                rate_limiter.acquire(tokens)
+            if attempt_state is not None:
+                # An abandoned attempt would still be billed; give its slot back
+                if attempt_state.abandoned:
+                    if rate_limiter:
+                        rate_limiter.cancel(tokens)
+                    raise AttemptAbandoned("Caller stopped waiting for this request")
+                attempt_state.sent_at = time.monotonic()
+            connection_stats.record_request()
+            request.extensions["trace"] = _trace
+            try:
+                response = super().handle_request(request)
+            except Exception:
+                if rate_limiter:
+                    rate_limiter.cancel(tokens)
+                raise
+            if rate_limiter:
+                rate_limiter.release(tokens, response.status_code, response.headers)
+            if response.status_code != 429 or attempt == RATE_LIMIT_MAX_RETRIES:
+                return response
+            response.close()
+            if attempt_state is not None:
+                attempt_state.sent_at = None
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        rate_limiter, tokens = _rate_limit_target(request)
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            if rate_limiter:
+                while wait := rate_limiter.try_acquire(tokens):
+                    await asyncio.sleep(wait)
+            connection_stats.record_request()
+            request.extensions["trace"] = _async_trace
+            try:
+                response = await super().handle_async_request(request)
+            except BaseException:
+                if rate_limiter:
+                    rate_limiter.cancel(tokens)
+                raise
+            if rate_limiter:
+                rate_limiter.release(tokens, response.status_code, response.headers)
+            if response.status_code != 429 or attempt == RATE_LIMIT_MAX_RETRIES:
+                return response
+            await response.aclose()
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout():
+    return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+
+@lru_cache(maxsize=None)
+def get_http_client():
+    return httpx.Client(
+        transport=_CountingTransport(limits=_limits()), timeout=_timeout()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_async_http_client():
+    return httpx.AsyncClient(
+        transport=_AsyncCountingTransport(limits=_limits()), timeout=_timeout()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model, openai_api_key, temperature=0.0):
+    # One client per (model, key, temperature) for the whole process. All of them
+    # share a single keep-alive connection pool, so TLS sessions are reused across
+    # scoring, summarization and interview question calls.
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        openai_api_key=openai_api_key,
+        openai_api_base=LLM_BASE_URL,
+        # Retries are handled by llm_retry, which knows about deadlines and hedging
+        max_retries=0,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+
+
+def get_connection_stats():
+    return connection_stats.snapshot()
@@ -0,0 +1,264 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import httpx
+import openai
+
+from metrics import LLM_HEDGES, LLM_RETRIES, track_stage
+from usage import record_usage, submit_in_context
+from llm_client import AttemptState, current_attempt
+from config import (
+    LLM_MAX_CONNECTIONS,
+    LLM_CALL_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+    LLM_HEDGING,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_LATENCY_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCallTimeout(TimeoutError):
+    pass
+
+
+RETRYABLE_ERRORS = (
+    LLMCallTimeout,
+    openai.APIConnectionError,  # Includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    httpx.TransportError,
+)
+
+# Attempts run here so the caller can stop waiting on a straggler. Callers are
+# already bounded by their own pools, this only has to be large enough not to queue.
+call_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONNECTIONS * 2)
+# How often the deadline is re-checked while an attempt waits on the rate limiter
+SEND_POLL_INTERVAL = 0.5
+
+
+class LatencyTracker:
+    # Rolling window of successful call latencies for one model
+    def __init__(self, window=LLM_LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def percentile(self, fraction):
+        with self._lock:
+            if len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+                return None
+            latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+class RetryStats:
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self._lock = threading.Lock()
+
+    def record(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "hedges": self.hedges,
+                "hedges_won": self.hedges_won,
+            }
+
+
+retry_stats = RetryStats()
+latency_trackers = {}
+latency_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(model):
+    with latency_trackers_lock:
+        if model not in latency_trackers:
+            latency_trackers[model] = LatencyTracker()
+        return latency_trackers[model]
+
+
+def backoff_delay(attempt):
+    # Full jitter, so calls that failed together don't retry together
+    return random.uniform(
+        0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2**attempt)
+    )
+
+
+def _timed(fn, tracker, attempt_state):
+    current_attempt.set(attempt_state)
+    started = time.monotonic()
+    with track_stage("llm_call"):
+        result = fn()
+    tracker.record(time.monotonic() - started)
+    return result
+
+
+def _time_left(attempt_states):
+    # LLM_CALL_TIMEOUT runs from when a request is sent, so waiting on the rate
+    # limiter or a 429's Retry-After doesn't use it up; None once every one is over
+    if any(attempt_state.sent_at is None for attempt_state in attempt_states):
+        return SEND_POLL_INTERVAL
+    time_left = (
+        max(attempt_state.sent_at for attempt_state in attempt_states)
+        + LLM_CALL_TIMEOUT
+        - time.monotonic()
+    )
+    return time_left if time_left > 0 else None
+
+
+def _first_result(attempts):
+    # Result of whichever attempt (future: AttemptState) succeeds first; if all
+    # of them fail, the first error. Attempts still running once it returns or
+    # times out are abandoned, so they aren't sent if they're still queued.
+    pending = set(attempts)
+    error = None
+    try:
+        while pending:
+            time_left = _time_left([attempts[future] for future in pending])
+            if time_left is None:
+                raise LLMCallTimeout(f"LLM call exceeded {LLM_CALL_TIMEOUT}s")
+            done, pending = wait(
+                pending, timeout=time_left, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    return future
+                error = error or future.exception()
+        raise error
+    finally:
+        for future in pending:
+            attempts[future].abandoned = True
+
+
+def _submit(fn, tracker):
+    # In the caller's context, so every attempt records its usage in the
+    # caller's track_usage blocks, including hedges that lose and attempts
+    # abandoned at the deadline: those are billed all the same
+    attempt_state = AttemptState()
+    return (
+        submit_in_context(call_executor, _timed, fn, tracker, attempt_state),
+        attempt_state,
+    )
+
+
+def _attempt(fn, tracker, hedge):
+    primary, primary_state = _submit(fn, tracker)
+    hedge_after = tracker.percentile(LLM_HEDGE_PERCENTILE) if hedge else None
+    if hedge_after is not None and hedge_after < LLM_CALL_TIMEOUT:
+        done, _ = wait([primary], timeout=hedge_after)
+        if not done:
+            # A straggler: race a duplicate against it. The loser can't be
+            # cancelled mid-request, its answer is simply discarded.
+            retry_stats.record(hedges=1)
+            duplicate, duplicate_state = _submit(fn, tracker)
+            winner = _first_result(
+                {primary: primary_state, duplicate: duplicate_state}
+            )
+            if winner is duplicate:
+                retry_stats.record(hedges_won=1)
+            LLM_HEDGES.labels("hedge" if winner is duplicate else "primary").inc()
+            return winner.result()
+    return _first_result({primary: primary_state}).result()
+
+
+def _generate(llm, messages):
+    # The reply text; the provider's token usage for it is recorded as soon as
+    # the attempt completes, whether or not its answer is the one used
+    result = llm.generate([messages])
+    _record_token_usage(
+        llm.model_name, (result.llm_output or {}).get("token_usage") or {}
+    )
+    return result.generations[0][0].text
+
+
+def _record_token_usage(model, token_usage):
+    record_usage(
+        model,
+        token_usage.get("prompt_tokens", 0),
+        token_usage.get("completion_tokens", 0),
+    )
+
+
+def call_llm(llm, messages, hedge=LLM_HEDGING):
+    # Sends `messages` and returns the reply text. Each attempt gets
+    # LLM_CALL_TIMEOUT seconds; timeouts, connection errors, 429s and 5xx are
+    # retried with jittered exponential backoff. With `hedge`, an attempt still
+    # running at the model's p95 latency gets a duplicate request.
+    tracker = get_latency_tracker(llm.model_name)
+    retry_stats.record(calls=1)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            return _attempt(lambda: _generate(llm, messages), tracker, hedge)
+        except RETRYABLE_ERRORS as e:
+            if isinstance(e, LLMCallTimeout):
+                retry_stats.record(timeouts=1)
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(
+                f"LLM call failed ({e!r}); retry {attempt + 1}/{LLM_MAX_RETRIES} "
+                f"in {delay:.1f}s"
+            )
+            retry_stats.record(retries=1)
+            LLM_RETRIES.labels(type(e).__name__).inc()
+            time.sleep(delay)
+
+
+async def acall_llm(llm, messages):
+    # Async counterpart of `call_llm` with the same deadline and retries, no hedging
+    tracker = get_latency_tracker(llm.model_name)
+    retry_stats.record(calls=1)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        started = time.monotonic()
+        try:
+            with track_stage("llm_call"):
+                result = await asyncio.wait_for(
+                    llm.agenerate([messages]), timeout=LLM_CALL_TIMEOUT
+                )
+            tracker.record(time.monotonic() - started)
+            _record_token_usage(
+                llm.model_name,
+                (result.llm_output or {}).get("token_usage") or {},
+            )
+            return result.generations[0][0].text
+        except (asyncio.TimeoutError, *RETRYABLE_ERRORS) as e:
+            if isinstance(e, asyncio.TimeoutError):
+                retry_stats.record(timeouts=1)
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(
+                f"LLM call failed ({e!r}); retry {attempt + 1}/{LLM_MAX_RETRIES} "
+                f"in {delay:.1f}s"
+            )
+            retry_stats.record(retries=1)
+            LLM_RETRIES.labels(type(e).__name__).inc()
+            await asyncio.sleep(delay)
+
+
+def get_retry_stats():
+    return retry_stats.snapshot()
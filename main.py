@@ -1,16 +1,12 @@
 import os
-import io
+import time
 import logging
 import tempfile
+import numpy as np
+import pandas as pd
 import streamlit as st
-from zipfile import ZipFile
-
-from langchain.document_loaders import PDFPlumberLoader
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-)
+from functools import partial
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
 
 from config import (
     PAGE_TITLE,
@@ -18,8 +14,42 @@ from config import (
     SUB_TITLE,
     LAYOUT,
     PROMPTS_MAPPING,
+    MAX_IN_FLIGHT,
+    PACKED_SCORING,
+    PREFILTER_MIN_SIMILARITY,
     MODEL,
+    CASCADE_SCORING,
+    CASCADE_MODEL,
+    CASCADE_MARGIN,
+    NEAR_DUPLICATE_REUSE,
+    NEAR_DUPLICATE_MIN_SIMILARITY,
+    DOWNLOAD_DIR,
+    DOWNLOAD_MAX_AGE_HOURS,
+)
+from scoring import (
+    get_cached_score,
+    parse_score_and_explanation,
+    categorize_score,
+    categorize_scores,
+    CATEGORIES,
+    score_resumes_deduplicated,
+    escalate_if_borderline,
+    get_scores_packed,
+    merge_prefilled_results,
+    estimate_batch_usage,
+    check_prompt_fits,
+    score_or_error,
 )
+from usage import collect_usage, track_usage, usage_csv, with_usage
+from score_cache import get_score_cache
+from llm_client import get_connection_stats
+from rate_limiter import get_rate_limit_stats
+from metrics import start_metrics_server, track_stage
+from pdf_extract import extract_pdf_text, extract_pdf_texts
+from prompt_templates import precompile_job_prompts
+from prefilter import prefilter_resumes, prefilter_result
+from batch_journal import BatchJournal, digest_pdf, make_batch_id
+from near_duplicates import is_reused_score
 
 openai_api_key = st.secrets["OPENAI_API_KEY"]
 
@@ -27,25 +57,16 @@ openai_api_key = st.secrets["OPENAI_API_KEY"]
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Build the scoring prompt for every configured posting once per process
+precompile_job_prompts()
+start_metrics_server()
+
 
-@st.cache_data
 def ingest_pdf(resume_file_buffer):
     print("Loading resume...")
     try:
-        # Create a temporary file manually
-        temp_file_path = tempfile.mktemp(suffix=".pdf")
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(resume_file_buffer.read())
-
-        # Use the temporary file path
-        loader = PDFPlumberLoader(temp_file_path)
-        documents = loader.load()
-        resume_text = " ".join(document.page_content for document in documents)
+        resume_text = extract_pdf_text(resume_file_buffer)
         print("Resume loaded successfully.")
-
-        # Delete the temporary file
-        os.remove(temp_file_path)
-
         return resume_text
     except Exception as e:
         logger.error(f"An error occurred while loading the resume: {e}")
@@ -56,14 +77,19 @@ def ingest_pdf(resume_file_buffer):
 def save_to_category_buffer(
     category, applicant_name, resume_bytes, response_content, main_zip
 ):
-    # Add the PDF file
-    main_zip.writestr(f"{category}/{applicant_name}/{applicant_name}.pdf", resume_bytes)
+    with track_stage("zip_write"):
+        # Add the PDF file; PDFs are already compressed, so store them as-is
+        main_zip.writestr(
+            f"{category}/{applicant_name}/{applicant_name}.pdf",
+            resume_bytes,
+            compress_type=ZIP_STORED,
+        )
 
-    # Add the response text
-    main_zip.writestr(
-        f"{category}/{applicant_name}/{applicant_name}_response.txt",
-        response_content,
-    )
+        # Add the response text
+        main_zip.writestr(
+            f"{category}/{applicant_name}/{applicant_name}_response.txt",
+            response_content,
+        )
 
 
 def get_parameters(
@@ -93,120 +119,28 @@ def get_parameters(
     return job_description, high_fit_resume, low_fit_resume
 
 
-# TODO: Switch to OpenAI function LLM call for more reliable response formatting - not an issue for now
-@st.cache_data
 def get_score(
     resume_text,
     job_description,
     high_fit_resume,
     low_fit_resume,
+    model=MODEL,
 ):
-    print("Getting score...")
-    llm = ChatOpenAI(
-        model=MODEL,
-        temperature=0.0,
-        openai_api_key=openai_api_key,
+    return get_cached_score(
+        resume_text,
+        job_description,
+        high_fit_resume,
+        low_fit_resume,
+        openai_api_key,
+        model,
+        reuse_near_duplicates=reuse_near_duplicates,
     )
-    # Step 1: Check for high fit resume
-    if high_fit_resume:
-        example_high_fit = (
-            "Example 'high-fit' resume with a score of 0.99 for reference:"
-        )
-        h_div = "-----------------"
-    else:
-        example_high_fit = ""
-        h_div = ""
-        high_fit_resume = ""
-
-    # Step 2: Check for low fit resume
-    if low_fit_resume:
-        example_low_fit = "Example 'low-fit' resume with a score of 0.10 for reference:"
-        l_div = "-----------------"
-    else:
-        example_low_fit = ""
-        l_div = ""
-        low_fit_resume = ""
-
-    template = f"""\
-You are an Industrial-Organizational Psychologist who specializes in personnel selection and assessment. 
-Your discipline of study, Industrial-Organizational Psychology, would best prepare you to answer the 
-question or perform the task of determining a job fit score based on a resume and a job description. 
-
-You will review the following resume and job description and determine a job fit score as a float between 0 and 1 (Example: 0.75) and a short explanation for the score.
-
-Applicant Resume:
------------------
-{resume_text}
------------------
-
-Job Key Areas of Responsibility:
------------------
-{job_description}
------------------
-
-{example_high_fit}
-{h_div}
-{high_fit_resume}
-{h_div}
-
-{example_low_fit}
-{l_div}
-{low_fit_resume}
-{l_div}
-
-Remember, your task is to determine a job fit score as a float between 0 and 1 (Example: 0.99) and a short explanation for score.
-Respond with only the score and explanation. Do not include the resume or job description in your response.
-
-RESPONSE FORMAT:
-Job Fit Score: 
-Explanation:
-
-Job Fit Score:
-    """
-
-    user_prompt = HumanMessagePromptTemplate.from_template(template=template)
-    chat_prompt = ChatPromptTemplate.from_messages([user_prompt])
-    formatted_prompt = chat_prompt.format_prompt(
-        resume_text=resume_text,
-        job_description=job_description,
-        high_fit_resume=high_fit_resume,
-        low_fit_resume=low_fit_resume,
-        l_div=l_div,
-        h_div=h_div,
-    ).to_messages()
-    # print(formatted_prompt)
-    llm = llm
-    result = llm(formatted_prompt)
-    return result.content
-
-
-def parse_score_and_explanation(result_content):
-    # Assuming the score and explanation are on separate lines
-    lines = result_content.split("\n")
-    score = float(lines[0])  # Assuming the score is on the first line
-    explanation = lines[1] if len(lines) > 1 else ""  # Explanation on the second line
-    return score, explanation
-
-
-def categorize_score(score, threshold1, threshold2):
-    if score > threshold1:
-        return "best"
-    elif score > threshold2:
-        return "good"
-    else:
-        return "rest"
-
-
-def parse_resume_bytes(resume_bytes):
-    resume_file_buffer = io.BytesIO(resume_bytes)
-    resume_text = ingest_pdf(resume_file_buffer)
-    return resume_text
 
 
 def parse_input(file, text_input_key):
     if file:
-        resume_file_buffer = io.BytesIO(file.getbuffer())
-        return ingest_pdf(resume_file_buffer)
+        # Uploaded files are already in-memory streams; parse them in place
+        return ingest_pdf(file)
     else:
         return st.session_state[text_input_key]
 
@@ -217,9 +151,6 @@ def process_resumes(uploaded_resumes):
     high_fit_resume_input = st.session_state.high_fit_resume_input
     low_fit_resume_input = st.session_state.low_fit_resume_input
 
-    # Create a dictionary to store the categorization results
-    categorization_results = {"best": [], "good": [], "rest": []}
-
     # Parse the custom user input
     job_description = parse_input(job_description_file, "job_description_input")
     high_fit_resume = parse_input(high_fit_resume_file, "high_fit_resume_input")
@@ -229,51 +160,331 @@ def process_resumes(uploaded_resumes):
     job_description, high_fit_resume, low_fit_resume = get_parameters(
         selected_job, job_description_input, high_fit_resume_input, low_fit_resume_input
     )
+    try:
+        check_prompt_fits(job_description, high_fit_resume, low_fit_resume)
+    except ValueError as e:
+        st.error(str(e))
+        return None
+
+    def update_progress(completed, total):
+        st.session_state.status_text = f"Completed {completed}/{total} scoring calls..."
+        st.session_state.progress = completed / total
+        progress_bar.progress(int(st.session_state.progress * 100))
 
-    zip_buffer = io.BytesIO()
     try:
-        with ZipFile(zip_buffer, "a") as main_zip:
-            for i, resume_file in enumerate(uploaded_resumes):
+        resume_files = list(uploaded_resumes)
+        resume_bytes_list = [resume_file.getbuffer() for resume_file in resume_files]
+
+        # Resumes finished by an earlier, interrupted run of this batch are restored
+        # from its journal instead of being scored again
+        resume_digests = [digest_pdf(resume_bytes) for resume_bytes in resume_bytes_list]
+        journal = BatchJournal(
+            make_batch_id(
+                resume_digests,
+                job_description,
+                high_fit_resume,
+                low_fit_resume,
+                {
+                    "min_similarity": min_similarity,
+                    # The cascade escalates relative to the thresholds
+                    "cascade": [best_select, good_select] if cascade_scoring else None,
+                    "packed": packed_scoring,
+                    "reuse_near_duplicates": reuse_near_duplicates,
+                },
+            )
+        )
+        journaled = journal.load()
+        prefilled_results = {
+            i: journaled[resume_digest]["result_content"]
+            for i, resume_digest in enumerate(resume_digests)
+            if resume_digest in journaled
+        }
+        restored_indices = set(prefilled_results)
+        if restored_indices:
+            st.caption(
+                f"Resumed batch: restored {len(restored_indices)} of "
+                f"{len(resume_files)} already scored resumes."
+            )
+        pending_indices = [
+            i for i in range(len(resume_files)) if i not in restored_indices
+        ]
+
+        # Read and parse every resume up front so the scoring calls can overlap
+        st.session_state.status_text = f"Reading {len(pending_indices)} resumes..."
+        resume_texts = dict(
+            zip(
+                pending_indices,
+                extract_pdf_texts(
+                    [resume_files[i] for i in pending_indices], return_exceptions=True
+                ),
+            )
+        )
+
+        # An unreadable PDF is reported and left unscored; the rest carry on
+        readable_indices = []
+        for i in pending_indices:
+            if isinstance(resume_texts[i], Exception):
+                st.warning(f"Could not read {resume_files[i].name}: {resume_texts[i]}")
+            else:
+                readable_indices.append(i)
+
+        # Obvious misses go straight to "rest" without an LLM call
+        scored_indices = readable_indices
+        if min_similarity > 0 and readable_indices:
+            similarities, keep = prefilter_resumes(
+                [resume_texts[i] for i in readable_indices],
+                job_description,
+                min_similarity,
+            )
+            scored_indices = [
+                i for position, i in enumerate(readable_indices) if keep[position]
+            ]
+            skipped_count = len(readable_indices) - len(scored_indices)
+            for position, i in enumerate(readable_indices):
+                if not keep[position]:
+                    prefilled_results[i] = prefilter_result(
+                        similarities[position], min_similarity
+                    )
+            logger.info(
+                f"Keyword prefilter skipped {skipped_count}/{len(readable_indices)} resumes"
+            )
+            st.caption(
+                f"Keyword prefilter skipped {skipped_count} of "
+                f"{len(readable_indices)} resumes, saving {skipped_count} LLM calls."
+            )
+        texts_to_score = [resume_texts[i] for i in scored_indices]
+        estimate = estimate_batch_usage(
+            texts_to_score, job_description, high_fit_resume, low_fit_resume
+        ).to_dict()
+        st.caption(
+            f"Pre-flight estimate: up to {estimate['total_tokens']:,} tokens "
+            f"(~${estimate['cost']:.2f}) for {len(texts_to_score)} resumes, "
+            f"before score cache hits."
+        )
+
+        escalate = None
+        if cascade_scoring:
+            escalate = partial(
+                escalate_if_borderline,
+                job_description=job_description,
+                high_fit_resume=high_fit_resume,
+                low_fit_resume=low_fit_resume,
+                threshold1=best_select,
+                threshold2=good_select,
+                openai_api_key=openai_api_key,
+            )
+
+        # Packed calls are shared between resumes, so they only count per batch
+        usage_by_position = {}
+        if packed_scoring:
+            scored_resumes = get_scores_packed(
+                texts_to_score,
+                job_description,
+                high_fit_resume,
+                low_fit_resume,
+                openai_api_key,
+                on_progress=update_progress,
+                escalate=escalate,
+                reuse_near_duplicates=reuse_near_duplicates,
+            )
+        else:
+
+            def score_and_escalate(resume_text):
+                result_content = get_score(
+                    resume_text, job_description, high_fit_resume, low_fit_resume
+                )
+                if escalate:
+                    result_content = escalate(resume_text, result_content)
+                return result_content
+
+            scored_resumes = collect_usage(
+                score_resumes_deduplicated(
+                    texts_to_score,
+                    # A resume that still fails after retries is reported, not fatal
+                    with_usage(partial(score_or_error, score_and_escalate)),
+                    MAX_IN_FLIGHT,
+                    on_progress=update_progress,
+                ),
+                usage_by_position,
+            )
+
+        # Only scores are kept; categories and the ZIP are derived from them on
+        # demand, so moving a threshold slider never re-runs this function
+        scores = np.full(len(resume_files), np.nan)
+        result_contents = [None] * len(resume_files)
+
+        # Only real LLM scores are journaled; restored results, prefilter skips and
+        # near-duplicate reuses are all cheap to reproduce
+        journaled_indices = set(scored_indices)
+        stopped = False
+
+        # Scoring runs lazily inside this block, so every call lands in batch_usage
+        with track_usage(job=selected_job) as batch_usage:
+            # Results arrive in upload order regardless of which call finishes first
+            for i, result_content in merge_prefilled_results(
+                scored_resumes, scored_indices, prefilled_results
+            ):
                 # User stopping mechanism
                 if st.session_state.stop_button_clicked:
                     st.session_state.status_text = "Process stopped by user."
+                    stopped = True
                     break
 
-                # Update progress
-                st.session_state.status_text = (
-                    f"Processing resume {i + 1}/{len(uploaded_resumes)}..."
-                )
+                if isinstance(result_content, Exception):
+                    st.warning(
+                        f"Could not score {resume_files[i].name}: {result_content}"
+                    )
+                    continue
+                try:
+                    score, explanation = parse_score_and_explanation(result_content)
+                except ValueError as e:
+                    # One garbled reply shouldn't throw away the rest of the batch
+                    st.warning(f"Unreadable response for {resume_files[i].name}: {e}")
+                    continue
+                scores[i] = score
+                result_contents[i] = result_content
+
+                if i in journaled_indices and not is_reused_score(result_content):
+                    journal.append(
+                        resume_digests[i],
+                        resume_files[i].name,
+                        score,
+                        explanation,
+                        categorize_score(score, best_select, good_select),
+                        result_content,
+                    )
+
+        # Only a stopped batch is worth resuming
+        if not stopped:
+            journal.discard()
+
+        usage = batch_usage.to_dict()
+        st.caption(
+            f"LLM usage: {usage['calls']} calls, {usage['total_tokens']:,} tokens "
+            f"(~${usage['cost']:.2f})"
+        )
+        return {
+            "upload_key": get_upload_key(resume_files),
+            "resume_files": resume_files,
+            "scores": scores,
+            "result_contents": result_contents,
+            "usage_csv": usage_csv(
+                [resume_file.name for resume_file in resume_files],
+                {
+                    scored_indices[position]: usage
+                    for position, usage in usage_by_position.items()
+                },
+                batch_usage,
+            ),
+            "zip_path": None,
+            "zip_thresholds": None,
+        }
 
-                # Read and parse resume bytes
-                resume_bytes = resume_file.getbuffer()
-                resume_text = parse_resume_bytes(resume_bytes)
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+        logger.error(f"An error occurred: {e}")
 
-                # Get score for the resume
-                result_content = get_score(
-                    resume_text, job_description, high_fit_resume, low_fit_resume
-                )
-                score, _ = parse_score_and_explanation(result_content)
 
-                # Categorize the score
-                category = categorize_score(score, best_select, good_select)
+def get_upload_key(resume_files):
+    return tuple((resume_file.name, resume_file.size) for resume_file in resume_files)
 
-                # Save the resume to the appropriate category buffer
-                applicant_name = os.path.splitext(resume_file.name)[0]
-                categorization_results[category].append(applicant_name)
 
-                save_to_category_buffer(
-                    category, applicant_name, resume_bytes, result_content, main_zip
-                )
+def build_results_zip(scored_batch, best_select, good_select):
+    # Written to a temp file on disk so memory stays flat for large batches
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    remove_old_downloads()
+    zip_file = tempfile.NamedTemporaryFile(
+        prefix="scores_", suffix=".zip", dir=DOWNLOAD_DIR, delete=False
+    )
+    zip_file.close()
+    categories = categorize_scores(scored_batch["scores"], best_select, good_select)
+    with ZipFile(zip_file.name, "w", compression=ZIP_DEFLATED) as main_zip:
+        for i, resume_file in enumerate(scored_batch["resume_files"]):
+            if scored_batch["result_contents"][i] is None:
+                continue
+            save_to_category_buffer(
+                CATEGORIES[categories[i]],
+                os.path.splitext(resume_file.name)[0],
+                resume_file.getbuffer(),
+                scored_batch["result_contents"][i],
+                main_zip,
+            )
+        main_zip.writestr("usage.csv", scored_batch["usage_csv"])
+    return zip_file.name
 
-                # Update progress bar
-                st.session_state.progress = (i + 1) / len(uploaded_resumes)
-                progress_bar.progress(int(st.session_state.progress * 100))
 
-        return zip_buffer.getvalue(), categorization_results
+def remove_zip(zip_path):
+    # The age sweep may already have removed it
+    if zip_path and os.path.exists(zip_path):
+        os.remove(zip_path)
 
-    except Exception as e:
-        st.error(f"An error occurred: {e}")
-        logger.error(f"An error occurred: {e}")
+
+def remove_old_downloads(max_age_hours=DOWNLOAD_MAX_AGE_HOURS):
+    # Sessions that are closed without discarding their batch leave their ZIP behind
+    cutoff = time.time() - max_age_hours * 60 * 60
+    for file_name in os.listdir(DOWNLOAD_DIR):
+        path = os.path.join(DOWNLOAD_DIR, file_name)
+        if file_name.endswith(".zip") and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            logger.info(f"Removed old results download {path}")
+
+
+def discard_scored_batch():
+    scored_batch = st.session_state.pop("scored_batch", None)
+    if scored_batch:
+        remove_zip(scored_batch["zip_path"])
+
+
+def show_scored_batch(scored_batch, best_select, good_select):
+    # Runs on every rerun, so threshold changes show up immediately: one
+    # vectorized pass over the stored scores, no extraction or LLM calls
+    scores = scored_batch["scores"]
+    categories = categorize_scores(scores, best_select, good_select)
+    scored = ~np.isnan(scores)
+    counts = np.bincount(categories[scored], minlength=len(CATEGORIES))
+
+    st.markdown("##### Categorized:")
+    for category, count in zip(CATEGORIES, counts):
+        st.write(f"{category.capitalize()}: {count}")
+
+    histogram, edges = np.histogram(scores[scored], bins=20, range=(0.0, 1.0))
+    st.bar_chart(
+        pd.DataFrame(
+            {"resumes": histogram}, index=[f"{edge:.2f}" for edge in edges[:-1]]
+        )
+    )
+
+    thresholds = (best_select, good_select)
+    if scored_batch["zip_path"] and not os.path.exists(scored_batch["zip_path"]):
+        # Swept after sitting unused for too long; prepare it again
+        scored_batch["zip_thresholds"] = None
+    if scored_batch["zip_thresholds"] != thresholds:
+        # Built only when asked for, then reused until a threshold moves
+        if st.button("📦 Prepare Download"):
+            remove_zip(scored_batch["zip_path"])
+            scored_batch["zip_path"] = build_results_zip(
+                scored_batch, best_select, good_select
+            )
+            scored_batch["zip_thresholds"] = thresholds
+    if scored_batch["zip_thresholds"] == thresholds:
+        # Hand Streamlit the file on disk rather than an extra in-memory copy
+        with open(scored_batch["zip_path"], "rb") as zip_file:
+            st.download_button(
+                label="✨ Download Scores ✨",
+                data=zip_file,
+                file_name="scores.zip",
+                mime="application/zip",
+            )
+
+    best_applicants = [
+        os.path.splitext(resume_file.name)[0]
+        for resume_file, category, is_scored in zip(
+            scored_batch["resume_files"], categories, scored
+        )
+        if is_scored and CATEGORIES[category] == "best"
+    ]
+    st.markdown("##### Your 'best' applicants:")
+    st.write(", ".join(best_applicants))
 
 
 # Streamlit interface
@@ -377,6 +588,28 @@ if uploaded_resumes:
         0.6,
         help="Default is 0.6. The lower the threshold, the more resumes will be categorized as 'good'.",
     )
+    min_similarity = st.slider(
+        "Skip resumes with keyword similarity below",
+        0.0,
+        0.5,
+        PREFILTER_MIN_SIMILARITY,
+        help="Resumes that share almost no vocabulary with the job description go straight to 'rest' without an LLM call. 0 scores every resume.",
+    )
+    cascade_scoring = st.checkbox(
+        f"Re-score borderline resumes with {CASCADE_MODEL}",
+        value=CASCADE_SCORING,
+        help=f"Resumes scored within {CASCADE_MARGIN} of either threshold are scored again by the stronger model, which decides their category.",
+    )
+    packed_scoring = st.checkbox(
+        "Score several resumes per request",
+        value=PACKED_SCORING,
+        help="Sends the job description and examples once for a group of resumes. Cheaper and faster for large batches.",
+    )
+    reuse_near_duplicates = st.checkbox(
+        "Reuse scores of near-duplicate resumes",
+        value=NEAR_DUPLICATE_REUSE,
+        help=f"A resume at least {NEAR_DUPLICATE_MIN_SIMILARITY:.0%} similar to one already scored for this job (e.g. a reapplication with a new phone number) takes that score without an LLM call. The match is noted in its response file.",
+    )
 
 
 start_button = st.button("Start Scoring Resumes")
@@ -406,21 +639,27 @@ if st.session_state.processing:
 if uploaded_resumes and start_button:
     st.session_state.status_text = "Starting the process..."
     try:
-        zip_data, categorization_results = process_resumes(uploaded_resumes)
-        if zip_data:
-            st.download_button(
-                label="✨ Download Scores ✨",
-                data=zip_data,
-                file_name="scores.zip",
-                mime="application/zip",
+        discard_scored_batch()
+        scored_batch = process_resumes(uploaded_resumes)
+        if scored_batch:
+            st.session_state.scored_batch = scored_batch
+            cache_stats = get_score_cache().stats()
+            st.caption(
+                f"Score cache: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses, {cache_stats['entries']} stored"
             )
-            # Displaying the results
-            st.markdown("##### Categorized:")
-            for category, resumes in categorization_results.items():
-                st.write(f"{category.capitalize()}: {len(resumes)}")
-
-            st.markdown("##### Your 'best' applicants:")
-            st.write(", ".join(categorization_results["best"]))
+            connection_stats = get_connection_stats()
+            st.caption(
+                f"LLM connections: {connection_stats['requests']} requests over "
+                f"{connection_stats['connections_opened']} connections "
+                f"({connection_stats['reuse_ratio']:.0%} reused)"
+            )
+            for model, rate_limit in get_rate_limit_stats().items():
+                if rate_limit["throttled"]:
+                    st.caption(
+                        f"{model}: rate limited {rate_limit['throttled']} times, "
+                        f"concurrency settled at {rate_limit['concurrency_limit']}"
+                    )
     except Exception as e:
         st.error(f"An error occurred during processing: {e}")
         logger.error(f"An error occurred during processing: {e}")
@@ -430,6 +669,15 @@ else:
     if start_button:
         st.warning("Please upload resumes before starting the process.")
 
+if "scored_batch" in st.session_state:
+    # A new set of uploads makes the stored scores meaningless
+    if not uploaded_resumes or st.session_state.scored_batch[
+        "upload_key"
+    ] != get_upload_key(uploaded_resumes):
+        discard_scored_batch()
+    else:
+        show_scored_batch(st.session_state.scored_batch, best_select, good_select)
+
 
 with st.expander("🤔 How to Use"):
     st.info(
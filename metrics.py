@@ -0,0 +1,119 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+from config import METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+# From sub-millisecond parsing up to multi-minute LLM calls
+STAGE_BUCKETS = (
+    0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300
+)
+
+STAGE_SECONDS = Histogram(
+    "recruitpilot_stage_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "recruitpilot_stage_errors_total",
+    "Pipeline stage calls that raised",
+    ["stage"],
+)
+CACHE_LOOKUPS = Counter(
+    "recruitpilot_cache_lookups_total",
+    "Disk cache lookups by cache and result",
+    ["cache", "result"],
+)
+LLM_RETRIES = Counter(
+    "recruitpilot_llm_retries_total",
+    "LLM call retries by the error that caused them",
+    ["reason"],
+)
+LLM_HEDGES = Counter(
+    "recruitpilot_llm_hedges_total",
+    "Hedged duplicate LLM requests by which attempt answered first",
+    ["winner"],
+)
+RATE_LIMITED = Counter(
+    "recruitpilot_rate_limited_total",
+    "429 responses from the LLM provider",
+    ["model"],
+)
+
+SINGLE_FLIGHT_SHARED = Counter(
+    "recruitpilot_single_flight_shared_total",
+    "Calls that waited on an identical in-flight call instead of making their own",
+    ["name"],
+)
+DUPLICATE_RESUMES = Counter(
+    "recruitpilot_duplicate_resumes_total",
+    "Resumes in a batch whose text matched an earlier resume in the same batch",
+)
+NEAR_DUPLICATES_REUSED = Counter(
+    "recruitpilot_near_duplicates_reused_total",
+    "Resumes that reused the score of a near-identical resume scored for the same job",
+)
+
+LLM_TOKENS = Counter(
+    "recruitpilot_llm_tokens_total",
+    "LLM tokens by model, job posting and prompt/completion",
+    ["model", "job", "kind"],
+)
+LLM_COST = Counter(
+    "recruitpilot_llm_cost_dollars_total",
+    "Estimated LLM spend in USD by model and job posting",
+    ["model", "job"],
+)
+
+_server_started = False
+_server_lock = threading.Lock()
+
+
+@contextmanager
+def track_stage(stage):
+    # Times the block into the stage histogram (failures included) and counts errors
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+def observe_stage(stage, seconds):
+    # For stages timed elsewhere, e.g. inside an extraction worker process
+    STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def metrics_response():
+    # (body, content type) in the Prometheus text format, for a /metrics route
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port=METRICS_PORT):
+    # Sidecar for the Streamlit apps, which can't add routes of their own.
+    # Streamlit reruns the script on every interaction; only the first call binds.
+    global _server_started
+    with _server_lock:
+        if _server_started:
+            return
+        _server_started = True
+        try:
+            start_http_server(port)
+            logger.info(f"Serving Prometheus metrics on port {port}")
+        except OSError as e:
+            logger.warning(f"Could not serve metrics on port {port}: {e}")
@@ -0,0 +1,227 @@
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from config import (
+    MODEL,
+    NEAR_DUPLICATE_PERMUTATIONS,
+    NEAR_DUPLICATE_BANDS,
+    NEAR_DUPLICATE_INDEX_PATH,
+    NEAR_DUPLICATE_MAX_ENTRIES,
+    NEAR_DUPLICATE_MAX_AGE_DAYS,
+)
+from prefilter import tokenize
+from score_cache import make_score_key
+from disk_cache import EVICT_EVERY
+
+logger = logging.getLogger(__name__)
+
+# Word 5-shingles: a changed phone number or one extra bullet touches only a few
+SHINGLE_SIZE = 5
+# (a * x + b) mod p over 32-bit shingle hashes; a, b < p keeps it inside uint64
+MERSENNE_PRIME = (1 << 31) - 1
+ROWS_PER_BAND = NEAR_DUPLICATE_PERMUTATIONS // NEAR_DUPLICATE_BANDS
+REUSE_NOTE = "Reused the score of a near-duplicate resume"
+
+# Fixed seed: signatures are stored, so the permutations must never change
+_rng = np.random.RandomState(20240101)
+_A = _rng.randint(1, MERSENNE_PRIME, size=NEAR_DUPLICATE_PERMUTATIONS).astype(np.uint64)
+_B = _rng.randint(0, MERSENNE_PRIME, size=NEAR_DUPLICATE_PERMUTATIONS).astype(np.uint64)
+
+NearDuplicate = namedtuple(
+    "NearDuplicate", ["similarity", "label", "result_content", "created_at"]
+)
+
+
+def make_job_key(job_description, high_fit_resume, low_fit_resume, model=MODEL):
+    # The score key of an empty resume: the same job, examples, model and prompt
+    # version, so a match is only reused for a score that would mean the same thing
+    return make_score_key("", job_description, high_fit_resume, low_fit_resume, model)
+
+
+def minhash(text):
+    # MinHash signature of the resume's word shingles, or None for an empty text
+    tokens = tokenize(text)
+    shingles = {
+        " ".join(tokens[i : i + SHINGLE_SIZE])
+        for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))
+    }
+    shingles.discard("")
+    if not shingles:
+        return None
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # One row per permutation, one column per shingle; keep each row's minimum
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_hashes(signature):
+    # LSH: resumes that agree on every row of any one band become candidates
+    return [
+        hashlib.blake2b(
+            signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND].tobytes(),
+            digest_size=8,
+        ).hexdigest()
+        for band in range(NEAR_DUPLICATE_BANDS)
+    ]
+
+
+def describe_reuse(match):
+    # Appended to the reused response, so it ends up in the explanation file
+    scored_on = time.strftime("%Y-%m-%d", time.localtime(match.created_at))
+    return (
+        f"{match.result_content.rstrip()}\n\n"
+        f'{REUSE_NOTE} ("{match.label}", scored {scored_on}; '
+        f"estimated Jaccard similarity {match.similarity:.2f})."
+    )
+
+
+def is_reused_score(result_content):
+    return REUSE_NOTE in result_content
+
+
+class NearDuplicateIndex:
+    # Persistent MinHash/LSH index of scored resumes per job. Safe to share
+    # between threads; every access goes through self._lock.
+    def __init__(
+        self,
+        path=NEAR_DUPLICATE_INDEX_PATH,
+        max_entries=NEAR_DUPLICATE_MAX_ENTRIES,
+        max_age_days=NEAR_DUPLICATE_MAX_AGE_DAYS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                job_key TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                label TEXT NOT NULL,
+                result_content TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                job_key TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                entry_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (job_key, band, hash);
+            CREATE INDEX IF NOT EXISTS bands_entry ON bands (entry_id);
+            """
+        )
+        self._conn.commit()
+        self.evict()
+
+    def find(self, resume_text, job_key, min_similarity):
+        # The most similar resume scored for this job, if it clears min_similarity
+        signature = minhash(resume_text)
+        if signature is None:
+            return None
+        conditions = " OR ".join(["(band = ? AND hash = ?)"] * NEAR_DUPLICATE_BANDS)
+        params = [job_key]
+        for band, band_hash in enumerate(band_hashes(signature)):
+            params += [band, band_hash]
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT signature, label, result_content, created_at FROM entries
+                WHERE created_at >= ? AND id IN (
+                    SELECT entry_id FROM bands WHERE job_key = ? AND ({conditions})
+                )
+                """,
+                [cutoff] + params,
+            ).fetchall()
+
+        best = None
+        for stored_signature, label, result_content, created_at in rows:
+            similarity = float(
+                np.mean(np.frombuffer(stored_signature, dtype=np.uint32) == signature)
+            )
+            if similarity >= min_similarity and (
+                best is None or similarity > best.similarity
+            ):
+                best = NearDuplicate(similarity, label, result_content, created_at)
+        return best
+
+    def add(self, resume_text, job_key, result_content):
+        signature = minhash(resume_text)
+        if signature is None:
+            return
+        # Usually the applicant's name; enough for a recruiter to find the original
+        label = next(
+            (line.strip() for line in resume_text.splitlines() if line.strip()), ""
+        )[:80]
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO entries (job_key, signature, label, result_content, "
+                "created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_key, signature.tobytes(), label, result_content, time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO bands (job_key, band, hash, entry_id) VALUES (?, ?, ?, ?)",
+                [
+                    (job_key, band, band_hash, cursor.lastrowid)
+                    for band, band_hash in enumerate(band_hashes(signature))
+                ],
+            )
+            self._conn.commit()
+            self._writes += 1
+            should_evict = self._writes % EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        # Drop expired entries first, then the oldest beyond the cap, then their bands
+        with self._lock:
+            cutoff = time.time() - self.max_age_seconds
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,))
+            self._conn.execute(
+                """
+                DELETE FROM entries WHERE id IN (
+                    SELECT id FROM entries ORDER BY created_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.execute(
+                "DELETE FROM bands WHERE entry_id NOT IN (SELECT id FROM entries)"
+            )
+            self._conn.commit()
+
+
+_near_duplicate_index = None
+_near_duplicate_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index():
+    # One index per process, shared by the Streamlit app, the API and the CLI
+    global _near_duplicate_index
+    with _near_duplicate_index_lock:
+        if _near_duplicate_index is None:
+            _near_duplicate_index = NearDuplicateIndex()
+            logger.info(f"Opened near-duplicate index at {_near_duplicate_index.path}")
+        return _near_duplicate_index
@@ -0,0 +1,336 @@
+# End-to-end throughput benchmark against other_tools/mock_llm_server.py. Start
+# the mock first, then run from the repository root:
+#   python -m other_tools.mock_llm_server --latency-median 2 &
+#   python -m other_tools.benchmark pipeline --sizes 10,100,1000,5000
+#   python -m other_tools.benchmark api --sizes 10,100 --server-pid <uvicorn pid>
+# The API services must themselves run with OPENAI_BASE_URL pointing at the mock.
+# Every run uses fresh synthetic resumes and, for `pipeline`, a throwaway cache
+# directory, so caches never flatter the numbers. Exits non-zero if any resume failed.
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+SKILLS = (
+    "account management",
+    "category insights",
+    "retail media",
+    "trade promotion",
+    "forecasting",
+    "Nielsen",
+    "Excel",
+    "client presentations",
+    "CPG",
+    "brand strategy",
+    "Amazon advertising",
+    "budget ownership",
+    "SQL",
+    "project management",
+    "negotiation",
+)
+TITLES = ("Account Manager", "Analyst", "Sales Associate", "Brand Manager", "Barista")
+
+
+def pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines):
+    # Smallest valid one-page PDF with a Helvetica text block; enough for pdfplumber
+    text_ops = "".join(f"({pdf_escape(line)}) Tj T* " for line in lines)
+    stream = f"BT /F1 10 Tf 12 TL 50 760 Td {text_ops}ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(pdf)
+
+
+def make_resume_lines(run_id, index):
+    rng = random.Random(f"{run_id}:{index}")
+    lines = [f"Applicant {index} ({run_id})", f"{rng.choice(TITLES)}"]
+    for year in range(rng.randint(2, 5)):
+        company = f"Company {rng.randint(1, 500)}"
+        lines.append(f"{2023 - 2 * year}: {rng.choice(TITLES)} at {company}")
+        lines.append("Skills: " + ", ".join(rng.sample(SKILLS, 4)))
+    return lines
+
+
+def write_resumes(directory, run_id, size):
+    paths = []
+    for index in range(size):
+        path = os.path.join(directory, f"applicant_{index:05d}.pdf")
+        with open(path, "wb") as pdf_file:
+            pdf_file.write(make_pdf(make_resume_lines(run_id, index)))
+        paths.append(path)
+    return paths
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def peak_rss_mb(pid=None):
+    # Another process (an API server): its high-water mark from /proc, Linux only
+    if pid:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+        return float("nan")
+    # This process plus its extraction workers; ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / scale, children / scale
+
+
+def server_rss_mb(args):
+    return peak_rss_mb(args.server_pid) if args.server_pid else None
+
+
+def report(label, size, elapsed, latencies, rss, failures=0):
+    # Only successful resumes count towards throughput; failures are returned so
+    # the run can exit non-zero
+    if rss is None:
+        rss_text = "server peak RSS n/a (pass --server-pid)"
+    elif isinstance(rss, tuple):
+        rss_text = f"peak RSS {rss[0]:.0f} MiB (+{rss[1]:.0f} MiB workers)"
+    else:
+        rss_text = f"server peak RSS {rss:.0f} MiB"
+    print(
+        f"{label} n={size}: {(size - failures) / elapsed:.2f} resumes/s "
+        f"succeeded in {elapsed:.1f}s | "
+        f"latency p50 {percentile(latencies, 0.5):.2f}s "
+        f"p95 {percentile(latencies, 0.95):.2f}s "
+        f"p99 {percentile(latencies, 0.99):.2f}s | {rss_text} | failed {failures}"
+    )
+    return failures
+
+
+def benchmark_pipeline(args, sizes):
+    # Imported here so the cache directory and base URL below apply to config
+    os.environ.setdefault("OPENAI_BASE_URL", args.mock_url)
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["RECRUITPILOT_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_cache_")
+    from config import PROMPTS_MAPPING
+    from pdf_extract import extract_pdf_texts
+    from scoring import (
+        get_cached_score,
+        parse_score_and_explanation,
+        categorize_score,
+        score_resumes_concurrently,
+    )
+
+    selected_prompts = next(iter(PROMPTS_MAPPING.values()))
+    run_id = os.urandom(4).hex()
+    total_failures = 0
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="bench_") as directory:
+            resume_paths = write_resumes(directory, f"{run_id}-{size}", size)
+            latencies = []
+
+            def score_fn(resume_text):
+                if isinstance(resume_text, Exception):
+                    return resume_text
+                started = time.monotonic()
+                try:
+                    return get_cached_score(
+                        resume_text,
+                        selected_prompts["job_description"],
+                        selected_prompts["high_fit_resume"],
+                        selected_prompts["low_fit_resume"],
+                        os.environ["OPENAI_API_KEY"],
+                    )
+                except Exception as e:
+                    return e
+                finally:
+                    latencies.append(time.monotonic() - started)
+
+            started = time.monotonic()
+            resume_texts = extract_pdf_texts(resume_paths, return_exceptions=True)
+            failures = 0
+            with ZipFile(
+                os.path.join(directory, "scores.zip"), "w", compression=ZIP_DEFLATED
+            ) as main_zip:
+                for i, result_content in score_resumes_concurrently(
+                    resume_texts, score_fn, args.concurrency
+                ):
+                    if isinstance(result_content, Exception):
+                        failures += 1
+                        continue
+                    try:
+                        score, _ = parse_score_and_explanation(result_content)
+                    except ValueError:
+                        failures += 1
+                        continue
+                    category = categorize_score(score, 0.8, 0.6)
+                    name = f"applicant_{i:05d}"
+                    main_zip.write(
+                        resume_paths[i],
+                        f"{category}/{name}/{name}.pdf",
+                        compress_type=ZIP_STORED,
+                    )
+                    main_zip.writestr(
+                        f"{category}/{name}/{name}_response.txt", result_content
+                    )
+            elapsed = time.monotonic() - started
+            total_failures += report(
+                "pipeline", size, elapsed, latencies, peak_rss_mb(), failures
+            )
+    return 1 if total_failures else 0
+
+
+async def benchmark_scoring_api(client, args, directory, size, run_id):
+    resume_paths = write_resumes(directory, run_id, size)
+    started = time.monotonic()
+    files = [
+        ("files", (os.path.basename(path), open(path, "rb"), "application/pdf"))
+        for path in resume_paths
+    ]
+    try:
+        response = await client.post(
+            f"{args.score_url}/jobs", files=files, data={"selected_job": args.job}
+        )
+    finally:
+        for _, (_, pdf_file, _) in files:
+            pdf_file.close()
+    response.raise_for_status()
+    status_url = f"{args.score_url}{response.json()['status_url']}"
+    while True:
+        status = (await client.get(status_url)).json()
+        if status["status"] in ("completed", "failed"):
+            break
+        await asyncio.sleep(args.poll_interval)
+    elapsed = time.monotonic() - started
+    failures = sum(1 for result in status["results"] if result["error"])
+    if status["status"] == "failed":
+        failures = size
+    return report(
+        "POST /jobs", size, elapsed, [elapsed], server_rss_mb(args), failures
+    )
+
+
+async def benchmark_questions_api(client, args, size):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    failures = 0
+
+    async def ask(index):
+        nonlocal failures
+        async with semaphore:
+            started = time.monotonic()
+            response = await client.post(
+                f"{args.questions_url}/generate_questions/",
+                params={
+                    "resume_text": "\n".join(make_resume_lines("questions", index)),
+                    "selected_job": args.job,
+                },
+            )
+            latencies.append(time.monotonic() - started)
+            if response.status_code != 200:
+                failures += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(ask(index) for index in range(size)))
+    elapsed = time.monotonic() - started
+    return report(
+        "POST /generate_questions/",
+        size,
+        elapsed,
+        latencies,
+        server_rss_mb(args),
+        failures,
+    )
+
+
+async def benchmark_api(args, sizes):
+    import httpx
+
+    run_id = os.urandom(4).hex()
+    total_failures = 0
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for size in sizes:
+            if args.score_url:
+                with tempfile.TemporaryDirectory(prefix="bench_") as directory:
+                    total_failures += await benchmark_scoring_api(
+                        client, args, directory, size, f"{run_id}-{size}"
+                    )
+            if args.questions_url:
+                total_failures += await benchmark_questions_api(client, args, size)
+    return 1 if total_failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Measure resumes/sec, latency percentiles and peak RSS "
+        "against the mock LLM server."
+    )
+    parser.add_argument(
+        "target",
+        choices=("pipeline", "api"),
+        help="'pipeline' scores in-process; 'api' drives running API services",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="10,100,1000,5000",
+        help="Comma-separated batch sizes, run smallest first",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8100/v1")
+    parser.add_argument("--job", default="CEMM - Senior CPG Account Strategist")
+    parser.add_argument(
+        "--score-url",
+        default="http://127.0.0.1:8000",
+        help="ResumeScoreTool base URL ('' skips it)",
+    )
+    parser.add_argument(
+        "--questions-url",
+        default="",
+        help="InterviewQuestionsTool base URL (skipped unless given)",
+    )
+    parser.add_argument(
+        "--server-pid",
+        type=int,
+        help="PID of the API server, to report its peak RSS (Linux)",
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = sorted(int(size) for size in args.sizes.split(",") if size.strip())
+    if args.target == "pipeline":
+        return benchmark_pipeline(args, sizes)
+    return asyncio.run(benchmark_api(args, sizes))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,206 +1,370 @@
-from dotenv import load_dotenv
+# Headless batch scoring, e.g. for cron. Run from the repository root:
+#   python -m other_tools.cli_app score resumes/ --job cpg_strategic --concurrency 16
+import argparse
+import csv
+import logging
 import os
-import shutil
+import sys
+import time
+from functools import partial
+
+from dotenv import load_dotenv
 
-from langchain.document_loaders import PDFPlumberLoader
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
+from config import (
+    PROMPTS_MAPPING,
+    MAX_IN_FLIGHT,
+    PREFILTER_MIN_SIMILARITY,
+    NEAR_DUPLICATE_REUSE,
+)
+from pdf_extract import extract_pdf_texts
+from prefilter import prefilter_resumes, prefilter_result
+from scoring import (
+    get_cached_score,
+    parse_score_and_explanation,
+    categorize_score,
+    score_resumes_deduplicated,
+    merge_prefilled_results,
+    estimate_batch_usage,
+    check_prompt_fits,
+    score_or_error,
 )
+from usage import USAGE_COLUMNS, collect_usage, track_usage, with_usage
+from score_cache import get_score_cache
+from llm_client import get_connection_stats
 
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+LINK_MODES = ("hardlink", "symlink", "manifest")
+
+
+def find_job(job):
+    # Accept either the display name or the short folder name, e.g. "cpg_strategic";
+    # returns the display name, so both spellings share one metrics label
+    for job_name, selected_prompts in PROMPTS_MAPPING.items():
+        if job in (job_name, selected_prompts["folder"]):
+            return job_name, selected_prompts
+    raise SystemExit(
+        f"Unknown job {job!r}. Run 'jobs' to list the available postings."
+    )
+
+
+def list_resumes(resumes_directory):
+    if not os.path.isdir(resumes_directory):
+        raise SystemExit(
+            f"The directory {resumes_directory} does not exist. Please make sure the path is correct."
+        )
+    return sorted(
+        resume
+        for resume in os.listdir(resumes_directory)
+        if resume.lower().endswith(".pdf")
+    )
 
-def ingest_pdf(resume):
-    print("Loading resume...")
-    loader = PDFPlumberLoader(resume)
-    documents = loader.load()
-    resume_text = " ".join(document.page_content for document in documents)
-    return resume_text
-
-
-def get_score(resume_text):
-    print("Getting score...")
-    llm = ChatOpenAI(
-        model="gpt-3.5-turbo-16k", temperature=0.0, openai_api_key=openai_api_key
-    )
-    template = f"""\
-You are an Industrial-Organizational Psychologist who specializes in personnel selection and assessment. 
-Your discipline of study, Industrial-Organizational Psychology, would best prepare you to answer the 
-question or perform the task of determining a job fit score based on a resume and a job description. 
-
-You will review the following resume and job description and determine a job fit score as a float between 0 and 1 (Example: 0.7) and a short explanation for the score.
-
-Applicant Resume:
------------------
-{resume_text}
------------------
-
-Job Key Areas of Responsibility:
------------------
-1. Strategic Marketing Leadership
-Proven CPG experience.
-Ability to work with clients to develop strategic marketing plans.
-Expertise in various marketing solutions (online, offline, mobile, social, etc.).
-Research and insights interpretation.
-Broad industry knowledge and client category expertise.
-2. Building and Growing Client Relationships
-Understanding clients' businesses.
-Building confidence and credibility.
-Achieving "trusted advisor" status.
-Developing multi-tiered agency-client relationships.
-3. Team Management
-Managing and motivating marketing professionals.
-Fostering teamwork and innovation.
-Understanding project details for accountability.
-4. Financial Performance Management
-Achieving revenue targets.
-Managing and planning accounts.
-Working with business development teams for new opportunities.
-5. Agency Contribution
-Desire to see clients succeed.
-Presentation skills.
-Balancing client demands with agency initiatives.
-Participating in agency leadership goals.
-6. Experience Requirements
-College degree (MBA preferred).
-Approximately 7+ years in the industry (brand or direct marketing experience).
-CPG and grocery retail experience.
-Proven strategic skills and insights.
-Strong knowledge of online and offline disciplines.
-Interpersonal/communication skills.
-Presentation development skills.
-Ability to manage multiple projects and tight deadlines.
-Openness to travel.
------------------
-
-Here is a sample "high-fit" resume with a score of 0.99 for reference:
------------------
-Sample High-Fit Resume for CPG Account Strategist at CEMM
-[Full Name]
-
-Email: [Email Address]
-Phone: [Phone Number]
-LinkedIn: [LinkedIn Profile]
-Summary:
-Highly experienced marketing and sales professional with over 7 years of proven success in CPG and grocery retail. 
-Specialized in developing strategic marketing plans, building client relationships, and leading high-performing teams. 
-Adept in online, offline, mobile, and social marketing strategies. Committed to delivering client success and achieving revenue targets.
-
-Professional Experience:
-
-Senior Sales Professional (From Alexandre Alves's Resume)
-
-Experienced in Account and Sales Management within the CPG market.
-Managed operations encompassing sales, logistics, and distribution.
-Guided teams to achieve objectives within tight timelines.
-Impact-driven Strategist (From Basem Ebied's Resume)
-
-Specialized in driving sales and brand growth.
-Collaborated with cross-functional teams to optimize user experiences.
-Delivered successful campaign outcomes and management results.
-Senior Marketing Manager (From John M. Robertson's Resume)
-
-20+ years of solid marketing experience building strong brands.
-Developed strategic and integrated brand plans.
-Created effective brand positioning and executed profitable growth strategies.
-Product Marketing Manager (From Kristin Leon's Resume)
-
-Developed and executed marketing and portfolio strategy for CBG brands.
-Managed commercialization and localization of product workflow.
-Education:
-
-Bachelor's Degree in Marketing: [University Name]
-MBA (Preferred): [University Name]
-Skills:
-
-Strong interpersonal/communication skills.
-Excellent presentation development and delivery skills.
-Ability to manage multiple concurrent projects and meet tight deadlines.
-Strong work ethic, integrity, and good business acumen.
-Additional Information:
-
-Open to travel as needed.
-Strong knowledge of upper and lower funnel strategies and tactics.
-Confidence without ego.
------------------
-
-Remember, your task is to determine a job fit score as a float between 0 and 1 (Example: 0.9) and a short explanation for score.
-Respond with only the score and explanation. Do not include the resume or job description in your response.
-
-Job Fit Score:
-    """
-
-    user_prompt = HumanMessagePromptTemplate.from_template(template=template)
-    chat_prompt = ChatPromptTemplate.from_messages([user_prompt])
-    formatted_prompt = chat_prompt.format_prompt(input=resume_text).to_messages()
-    llm = llm
-    result = llm(formatted_prompt)
-    return result.content
-
-
-def parse_score_and_explanation(result_content):
-    # Assuming the score and explanation are on separate lines
-    lines = result_content.split("\n")
-    score = float(lines[0])  # Assuming the score is on the first line
-    explanation = lines[1] if len(lines) > 1 else ""  # Explanation on the second line
-    return score, explanation
-
-
-def categorize_score(score, threshold1=0.8, threshold2=0.5):
-    if score > threshold1:
-        return "best"
-    elif score > threshold2:
-        return "maybe"
-    else:
-        return "low"
-
-
-def save_to_category_folder(resumes_directory, resume, category, result_content):
-    # Determine the applicant's name from the resume file name
+
+class ProgressReporter:
+    # One status line on stderr with throughput and ETA, rewritten in place
+    def __init__(self, label, stream=sys.stderr):
+        self.label = label
+        self.stream = stream
+        self.started = time.monotonic()
+
+    def __call__(self, completed, total):
+        elapsed = time.monotonic() - self.started
+        rate = completed / elapsed if elapsed > 0 else 0.0
+        eta = (total - completed) / rate if rate > 0 else 0.0
+        self.stream.write(
+            f"\r{self.label}: {completed}/{total} "
+            f"({rate:.2f}/s, elapsed {elapsed:.0f}s, ETA {eta:.0f}s)   "
+        )
+        self.stream.flush()
+        if completed == total:
+            self.stream.write("\n")
+
+
+def link_resume(source_path, target_path, link_mode):
+    # Never copy PDF bytes: hardlink (falling back to a symlink across
+    # filesystems), symlink, or leave the PDF where it is and rely on the manifest
+    if link_mode == "manifest":
+        return source_path
+    if os.path.lexists(target_path):
+        os.remove(target_path)
+    if link_mode == "hardlink":
+        try:
+            os.link(source_path, target_path)
+            return target_path
+        except OSError:
+            pass
+    os.symlink(os.path.abspath(source_path), target_path)
+    return target_path
+
+
+def save_to_category_folder(
+    output_directory, resume_path, category, result_content, link_mode
+):
+    resume = os.path.basename(resume_path)
     applicant_name = os.path.splitext(resume)[0]
-    scores_directory = os.path.join(
-        resumes_directory, "scores", category, applicant_name
-    )
-    os.makedirs(
-        scores_directory, exist_ok=True
-    )  # Ensures the folder is created if it doesn't exist
-    original_pdf_path = os.path.join(resumes_directory, resume)
-    new_pdf_path = os.path.join(scores_directory, resume)
-    shutil.copy(original_pdf_path, new_pdf_path)
+    scores_directory = os.path.join(output_directory, category, applicant_name)
+    os.makedirs(scores_directory, exist_ok=True)
+    pdf_path = link_resume(
+        resume_path, os.path.join(scores_directory, resume), link_mode
+    )
     text_file_path = os.path.join(scores_directory, f"{applicant_name}_response.txt")
     with open(text_file_path, "w", encoding="utf-8") as text_file:
         text_file.write(result_content)
-    print(f"Saved PDF and response to {scores_directory}")
+    return pdf_path
+
+
+def score_command(args):
+    job_name, selected_prompts = find_job(args.job)
+    job_description = selected_prompts["job_description"]
+    high_fit_resume = selected_prompts["high_fit_resume"]
+    low_fit_resume = selected_prompts["low_fit_resume"]
+    try:
+        check_prompt_fits(job_description, high_fit_resume, low_fit_resume)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    resumes = list_resumes(args.resumes_directory)
+    if not resumes:
+        print(f"No PDF resumes found in {args.resumes_directory}.")
+        return 0
+    resume_paths = [
+        os.path.join(args.resumes_directory, resume) for resume in resumes
+    ]
+    output_directory = args.output or os.path.join(
+        args.resumes_directory, "scores", selected_prompts["folder"]
+    )
+    os.makedirs(output_directory, exist_ok=True)
+    started = time.monotonic()
+
+    print(f"Loading {len(resumes)} resumes...", file=sys.stderr)
+    resume_texts = extract_pdf_texts(resume_paths, return_exceptions=True)
+
+    prefilled_results = {}
+    failures = {}
+    scored_indices = []
+    for i, resume_text in enumerate(resume_texts):
+        if isinstance(resume_text, Exception):
+            failures[i] = resume_text
+        else:
+            scored_indices.append(i)
+
+    if args.min_similarity > 0 and scored_indices:
+        similarities, keep = prefilter_resumes(
+            [resume_texts[i] for i in scored_indices],
+            job_description,
+            args.min_similarity,
+        )
+        for position, i in enumerate(scored_indices):
+            if not keep[position]:
+                prefilled_results[i] = prefilter_result(
+                    similarities[position], args.min_similarity
+                )
+        scored_indices = [
+            i for position, i in enumerate(scored_indices) if keep[position]
+        ]
+        print(
+            f"Keyword prefilter skipped {len(prefilled_results)} resumes.",
+            file=sys.stderr,
+        )
 
+    texts_to_score = [resume_texts[i] for i in scored_indices]
+    estimate = estimate_batch_usage(
+        texts_to_score, job_description, high_fit_resume, low_fit_resume
+    ).to_dict()
+    print(
+        f"Pre-flight estimate: up to {estimate['total_tokens']:,} tokens "
+        f"(~${estimate['cost']:.2f}) for {len(texts_to_score)} resumes, "
+        f"before score cache hits.",
+        file=sys.stderr,
+    )
+    if args.estimate_only:
+        return 0
+
+    score_fn = with_usage(
+        partial(
+            score_or_error,
+            get_cached_score,
+            job_description=job_description,
+            high_fit_resume=high_fit_resume,
+            low_fit_resume=low_fit_resume,
+            openai_api_key=openai_api_key,
+            reuse_near_duplicates=args.reuse_near_duplicates,
+        )
+    )
+    usage_by_position = {}
+    scored_resumes = collect_usage(
+        score_resumes_deduplicated(
+            texts_to_score,
+            score_fn,
+            args.concurrency,
+            on_progress=ProgressReporter("Scoring"),
+        ),
+        usage_by_position,
+    )
 
-def main(resumes_directory, folder_path):
-    # Ensure the main directory exists
-    if not os.path.exists(resumes_directory):
-        print(
-            f"The directory {resumes_directory} does not exist. Please make sure the path is correct."
+    counts = {"best": 0, "good": 0, "rest": 0}
+    manifest_path = os.path.join(output_directory, "manifest.csv")
+    with track_usage(job=job_name) as batch_usage, open(
+        manifest_path, "w", newline="", encoding="utf-8"
+    ) as manifest_file:
+        manifest = csv.writer(manifest_file)
+        manifest.writerow(
+            ["resume", "category", "score", "explanation", "pdf_path", *USAGE_COLUMNS]
         )
-        return
+        positions = {i: position for position, i in enumerate(scored_indices)}
+        for i, result_content in merge_prefilled_results(
+            scored_resumes, scored_indices, prefilled_results
+        ):
+            if isinstance(result_content, Exception):
+                failures[i] = result_content
+                continue
+            try:
+                score, explanation = parse_score_and_explanation(result_content)
+            except ValueError as e:
+                failures[i] = e
+                continue
+            category = categorize_score(score, args.best, args.good)
+            counts[category] += 1
+            pdf_path = save_to_category_folder(
+                output_directory, resume_paths[i], category, result_content, args.link
+            )
+            # Resumes skipped by the prefilter made no calls
+            if i in positions:
+                usage = usage_by_position[positions[i]].to_dict()
+            else:
+                usage = dict.fromkeys(USAGE_COLUMNS, 0)
+            manifest.writerow(
+                [
+                    resumes[i],
+                    category,
+                    score,
+                    explanation,
+                    pdf_path,
+                    *(usage[name] for name in USAGE_COLUMNS),
+                ]
+            )
+
+    for i, error in sorted(failures.items()):
+        print(f"An error occurred while processing resume {resumes[i]}: {error}")
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    usage = batch_usage.to_dict()
+    cache_stats = get_score_cache().stats()
+    connection_stats = get_connection_stats()
+    succeeded = len(resumes) - len(failures)
+    print(
+        f"Scored {succeeded}/{len(resumes)} resumes in "
+        f"{elapsed:.1f}s ({succeeded / elapsed:.2f} resumes/s). "
+        f"best={counts['best']} good={counts['good']} rest={counts['rest']} "
+        f"failed={len(failures)}. Score cache: {cache_stats['hits']} hits, "
+        f"{cache_stats['misses']} misses. LLM connections: "
+        f"{connection_stats['connections_opened']} opened for "
+        f"{connection_stats['requests']} requests. LLM usage: {usage['calls']} "
+        f"calls, {usage['total_tokens']:,} tokens (~${usage['cost']:.2f})."
+    )
+    print(f"Results written to {output_directory} (manifest: {manifest_path})")
+    return 1 if failures else 0
 
-    for resume in folder_path:
-        try:
-            resume_path = os.path.join(resumes_directory, resume)
-            print(f"Processing resume: {resume_path}")
-            resume_text = ingest_pdf(resume_path)
-            result_content = get_score(resume_text)
-            score, _ = parse_score_and_explanation(result_content)
-            category = categorize_score(score)
-            save_to_category_folder(resumes_directory, resume, category, result_content)
-        except Exception as e:
-            print(f"An error occurred while processing resume {resume}: {e}")
+
+def extract_command(args):
+    resumes = list_resumes(args.resumes_directory)
+    resume_paths = [
+        os.path.join(args.resumes_directory, resume) for resume in resumes
+    ]
+    resume_texts = extract_pdf_texts(
+        resume_paths, separator="\n", return_exceptions=True
+    )
+    failed = 0
+    for resume, resume_path, resume_text in zip(resumes, resume_paths, resume_texts):
+        if isinstance(resume_text, Exception):
+            print(f"An error occurred while processing resume {resume}: {resume_text}")
+            failed += 1
             continue
+        output_file_path = f"{resume_path}_text.txt"
+        with open(output_file_path, "w", encoding="utf-8") as text_file:
+            text_file.write(resume_text)
+    print(f"Extracted {len(resumes) - failed}/{len(resumes)} resumes.")
+    return 1 if failed else 0
+
+
+def jobs_command(args):
+    for job_name, selected_prompts in PROMPTS_MAPPING.items():
+        print(f"{selected_prompts['folder']}\t{job_name}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="recruitpilot",
+        description="Score and categorize resumes without the Streamlit UI.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score_parser = subparsers.add_parser(
+        "score", help="Score every PDF in a directory against a job posting"
+    )
+    score_parser.add_argument("resumes_directory", help="Directory of PDF resumes")
+    score_parser.add_argument(
+        "--job",
+        required=True,
+        help="Job posting name or folder from PROMPTS_MAPPING (see 'jobs')",
+    )
+    score_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_IN_FLIGHT,
+        help=f"Max concurrent LLM calls (default {MAX_IN_FLIGHT})",
+    )
+    score_parser.add_argument(
+        "--output",
+        help="Output directory (default <resumes_directory>/scores/<job folder>)",
+    )
+    score_parser.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="hardlink",
+        help="How PDFs are placed in category folders; 'manifest' writes only the CSV",
+    )
+    score_parser.add_argument("--best", type=float, default=0.8)
+    score_parser.add_argument("--good", type=float, default=0.6)
+    score_parser.add_argument(
+        "--min-similarity",
+        type=float,
+        default=PREFILTER_MIN_SIMILARITY,
+        help="Keyword prefilter floor; resumes below it skip the LLM (0 disables)",
+    )
+    score_parser.add_argument(
+        "--reuse-near-duplicates",
+        action=argparse.BooleanOptionalAction,
+        default=NEAR_DUPLICATE_REUSE,
+        help="Reuse the score of a near-identical resume already scored for the job",
+    )
+    score_parser.add_argument(
+        "--estimate-only",
+        action="store_true",
+        help="Print the pre-flight token and cost estimate and exit without scoring",
+    )
+    score_parser.set_defaults(func=score_command)
+
+    extract_parser = subparsers.add_parser(
+        "extract", help="Write the extracted text of every PDF next to it"
+    )
+    extract_parser.add_argument("resumes_directory")
+    extract_parser.set_defaults(func=extract_command)
+
+    jobs_parser = subparsers.add_parser("jobs", help="List the configured postings")
+    jobs_parser.set_defaults(func=jobs_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
 
 
 if __name__ == "__main__":
-    resumes_directory = "resumes"
-    if not os.path.exists(resumes_directory):
-        os.makedirs(resumes_directory)  # Create main directory if it doesn't exist
-    folder_path = os.listdir(resumes_directory)
-    main(resumes_directory, folder_path)
+    sys.exit(main())
@@ -1,23 +1,25 @@
-from langchain.document_loaders import PDFPlumberLoader
+# Saves the text of every PDF in good_res/ next to it. Run from the repository root:
+#   python -m other_tools.extract_text
 import os
 
-
-def ingest_pdf(resume):
-    print(f"Loading resume: {resume}...")
-    loader = PDFPlumberLoader(resume)
-    documents = loader.load()
-    resume_text = "\n".join(
-        [doc.page_content for doc in documents]
-    )  # Concatenating the text content
-    return resume_text
+from pdf_extract import extract_pdf_texts
 
 
 def main(resumes_directory, folder_path):
-    for resume in folder_path:
+    resumes = [resume for resume in folder_path if resume.lower().endswith(".pdf")]
+    print(f"Loading {len(resumes)} resumes...")
+    resume_texts = extract_pdf_texts(
+        [os.path.join(resumes_directory, resume) for resume in resumes],
+        separator="\n",
+        return_exceptions=True,
+    )
+
+    for resume, resume_text in zip(resumes, resume_texts):
         try:
             resume_path = os.path.join(resumes_directory, resume)
             print(f"Processing resume: {resume_path}")
-            resume_text = ingest_pdf(resume_path)
+            if isinstance(resume_text, Exception):
+                raise resume_text
 
             # Saving the extracted text to a file
             output_file_path = os.path.join(resumes_directory, f"{resume}_text.txt")
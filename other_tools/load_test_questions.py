@@ -0,0 +1,88 @@
+# Fire concurrent requests at the interview questions API and compare the wall time
+# with the summed per-request latency. If an endpoint blocks the event loop the
+# requests serialize and the speedup stays near 1x; otherwise it approaches the
+# concurrency. Run from the repository root against a running server:
+#   python -m other_tools.load_test_questions resumes/example.pdf --concurrency 20
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+
+async def timed_request(client, method, url, **kwargs):
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    response.raise_for_status()
+    return time.perf_counter() - started, response
+
+
+async def run_load(label, concurrency, make_request):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(make_request() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    print(
+        f"{label}: {concurrency} requests in {wall:.2f}s | "
+        f"p50 {statistics.median(latencies):.2f}s, max {latencies[-1]:.2f}s | "
+        f"speedup vs serial {sum(latencies) / wall:.1f}x"
+    )
+    return results
+
+
+async def main(args):
+    with open(args.resume, "rb") as resume_file:
+        resume_bytes = resume_file.read()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as client:
+        upload_results = await run_load(
+            "POST /upload/",
+            args.concurrency,
+            lambda: timed_request(
+                client,
+                "POST",
+                "/upload/",
+                files={"file": ("resume.pdf", resume_bytes, "application/pdf")},
+            ),
+        )
+        resume_text = upload_results[0][1].json()["resume_text"]
+
+        if args.skip_questions:
+            return 0
+        await run_load(
+            "POST /generate_questions/",
+            args.concurrency,
+            lambda: timed_request(
+                client,
+                "POST",
+                "/generate_questions/",
+                params={"resume_text": resume_text, "selected_job": args.job},
+            ),
+        )
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Load test the interview questions API with concurrent requests."
+    )
+    parser.add_argument("resume", help="PDF resume to upload")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--job", default="CEMM - Senior CPG Account Strategist")
+    parser.add_argument(
+        "--skip-questions",
+        action="store_true",
+        help="Only load test /upload/ (no LLM calls)",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(build_parser().parse_args())))
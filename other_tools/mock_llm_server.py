@@ -0,0 +1,269 @@
+# OpenAI-compatible stand-in for /v1/chat/completions, so the pipeline and the
+# APIs can be load tested without network access or API spend. Replies are
+# canned but shaped like the real ones (single scores, packed JSON arrays,
+# summaries, interview questions). Run from the repository root:
+#   python -m other_tools.mock_llm_server --port 8100 --latency-median 2 --error-rate 0.01
+# and point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CANDIDATE_ID = re.compile(r"^Candidate (C\d+):", re.MULTILINE)
+
+EXPLANATIONS = (
+    "Relevant account management experience and strong client communication.",
+    "Some transferable skills, but limited experience with CPG brands.",
+    "Background is mostly unrelated to the key areas of responsibility.",
+    "Solid analytics background with several directly relevant campaigns.",
+)
+
+QUESTIONS = """\
+Applicant Name
+Mock Applicant
+
+List of positive attributes for the position
+- Relevant industry experience
+- Clear track record of client work
+
+List of negative attributes for the position
+- Limited people management
+
+List of questions for the interview
+1. Walk me through a campaign you owned end to end.
+2. How do you prioritize competing client requests?
+3. Tell me about a time a forecast turned out wrong.
+"""
+
+app = FastAPI()
+settings = argparse.Namespace(
+    latency_median=1.0,
+    latency_sigma=0.5,
+    error_rate=0.0,
+    rpm=0,
+    seed=None,
+)
+request_times = deque()
+request_times_lock = threading.Lock()
+
+
+def approximate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def mock_score(content):
+    # Deterministic per prompt, so reruns and duplicates agree like a cached model would
+    digest = int.from_bytes(
+        hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+    score = round(0.05 + (digest % 9500) / 10000, 2)
+    return score, EXPLANATIONS[digest % len(EXPLANATIONS)]
+
+
+def mock_reply(content):
+    candidate_ids = CANDIDATE_ID.findall(content)
+    if candidate_ids:
+        results = []
+        for candidate_id in candidate_ids:
+            score, explanation = mock_score(f"{candidate_id}:{content}")
+            results.append(
+                {"id": candidate_id, "score": score, "explanation": explanation}
+            )
+        return json.dumps(results)
+    if "Job Fit Score" in content:
+        score, explanation = mock_score(content)
+        return f"{score}\n{explanation}"
+    if "interview questions" in content:
+        return QUESTIONS
+    # Summarization and anything else: a shortened echo of the input
+    return " ".join(content.split()[:200])
+
+
+def sample_latency():
+    if settings.latency_median <= 0:
+        return 0.0
+    return random.lognormvariate(
+        math.log(settings.latency_median), settings.latency_sigma
+    )
+
+
+def check_rate_limit():
+    # Sliding one-minute window; returns (remaining requests, seconds until a slot frees)
+    if not settings.rpm:
+        return None, 0.0
+    now = time.monotonic()
+    with request_times_lock:
+        while request_times and request_times[0] <= now - 60:
+            request_times.popleft()
+        if len(request_times) >= settings.rpm:
+            return 0, request_times[0] + 60 - now
+        request_times.append(now)
+        return settings.rpm - len(request_times), 0.0
+
+
+def rate_limit_headers(remaining):
+    if not settings.rpm:
+        return {}
+    return {
+        "x-ratelimit-limit-requests": str(settings.rpm),
+        "x-ratelimit-remaining-requests": str(remaining),
+    }
+
+
+def error_response(status_code, message, headers=None):
+    return JSONResponse(
+        {"error": {"message": message, "type": "mock_error", "code": status_code}},
+        status_code=status_code,
+        headers=headers,
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    remaining, retry_after = check_rate_limit()
+    if retry_after:
+        return error_response(
+            429,
+            "Rate limit reached for requests",
+            {"retry-after": f"{retry_after:.3f}", **rate_limit_headers(0)},
+        )
+    if random.random() < settings.error_rate:
+        await asyncio.sleep(sample_latency() / 10)
+        return error_response(500, "The server had an error processing your request")
+
+    content = "\n".join(
+        message.get("content") or "" for message in body.get("messages", [])
+    )
+    reply = mock_reply(content)
+    model = body.get("model", "mock")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    latency = sample_latency()
+    headers = rate_limit_headers(remaining)
+
+    if body.get("stream"):
+        return StreamingResponse(
+            stream_reply(completion_id, created, model, reply, latency),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    await asyncio.sleep(latency)
+    prompt_tokens = approximate_tokens(content)
+    completion_tokens = approximate_tokens(reply)
+    return JSONResponse(
+        {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        },
+        headers=headers,
+    )
+
+
+async def stream_reply(completion_id, created, model, reply, latency):
+    # A fifth of the latency before the first token, the rest spread over the reply
+    words = reply.split(" ")
+    await asyncio.sleep(latency / 5)
+    for i, word in enumerate(words):
+        delta = {"content": word if i == 0 else f" {word}"}
+        if i == 0:
+            delta["role"] = "assistant"
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(latency * 4 / 5 / len(words))
+    final = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "mock", "object": "model"}]}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Serve canned OpenAI chat completions with configurable "
+        "latency and errors."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument(
+        "--latency-median",
+        type=float,
+        default=settings.latency_median,
+        help="Median seconds per completion (lognormal); 0 answers immediately",
+    )
+    parser.add_argument(
+        "--latency-sigma",
+        type=float,
+        default=settings.latency_sigma,
+        help="Lognormal sigma; larger values give a longer tail",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=settings.error_rate,
+        help="Share of requests answered with a 500",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=settings.rpm,
+        help="Requests per minute before answering 429 with Retry-After (0 disables)",
+    )
+    parser.add_argument("--seed", type=int, help="Seed latencies and errors")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    for name in vars(settings):
+        setattr(settings, name, getattr(args, name))
+    if args.seed is not None:
+        random.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
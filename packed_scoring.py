@@ -0,0 +1,102 @@
+import json
+import logging
+
+from config import (
+    MODEL,
+    PACKED_MAX_RESUMES,
+    PACKED_TOKENS_PER_RESULT,
+)
+from llm_client import get_chat_model
+from llm_retry import call_llm
+from prompt_templates import get_packed_scoring_prompt
+from tokens import count_tokens, get_context_window
+
+logger = logging.getLogger(__name__)
+
+# Extra tokens per candidate for the "Candidate C1:" header and dividers
+CANDIDATE_OVERHEAD_TOKENS = 20
+
+
+def parse_packed_response(result_content, candidate_ids):
+    # Returns one "score\nexplanation" string per candidate, matching the single
+    # resume response format so parse_score_and_explanation and the ZIP are unchanged
+    start = result_content.find("[")
+    end = result_content.rfind("]")
+    if start == -1 or end == -1:
+        raise ValueError("No JSON array in packed response")
+    items = json.loads(result_content[start : end + 1])
+    results_by_id = {str(item["id"]): item for item in items}
+
+    results = []
+    for candidate_id in candidate_ids:
+        item = results_by_id[candidate_id]
+        score = float(item["score"])
+        if not 0.0 <= score <= 1.0:
+            raise ValueError(f"Score out of range for {candidate_id}: {score}")
+        explanation = " ".join(str(item.get("explanation", "")).split())
+        results.append(f"{score}\n{explanation}")
+    return results
+
+
+def pack_resumes(
+    resume_texts,
+    job_description,
+    high_fit_resume,
+    low_fit_resume,
+    model=MODEL,
+    max_pack_size=PACKED_MAX_RESUMES,
+):
+    # Greedily group consecutive resumes so each pack's prompt plus the expected
+    # answers fits the model's context window. Returns lists of indices.
+    prompt = get_packed_scoring_prompt(
+        job_description, high_fit_resume, low_fit_resume, model
+    )
+    budget = get_context_window(model) - prompt.static_tokens
+
+    packs = []
+    pack = []
+    used = 0
+    for i, resume_text in enumerate(resume_texts):
+        cost = (
+            count_tokens(resume_text, model)
+            + CANDIDATE_OVERHEAD_TOKENS
+            + PACKED_TOKENS_PER_RESULT
+        )
+        if pack and (used + cost > budget or len(pack) >= max_pack_size):
+            packs.append(pack)
+            pack = []
+            used = 0
+        pack.append(i)
+        used += cost
+    if pack:
+        packs.append(pack)
+    return packs
+
+
+def score_resume_pack(
+    resume_texts,
+    job_description,
+    high_fit_resume,
+    low_fit_resume,
+    openai_api_key,
+    single_score_fn,
+):
+    # Score several resumes with one LLM call. Falls back to `single_score_fn`
+    # (one call per resume) when there is only one resume or the reply is unusable.
+    if len(resume_texts) == 1:
+        return [single_score_fn(resume_texts[0])]
+
+    candidate_ids = [f"C{i + 1}" for i in range(len(resume_texts))]
+    print(f"Getting scores for {len(resume_texts)} resumes...")
+    llm = get_chat_model(MODEL, openai_api_key)
+    prompt = get_packed_scoring_prompt(
+        job_description, high_fit_resume, low_fit_resume
+    )
+    result_content = call_llm(
+        llm, prompt.to_messages(list(zip(candidate_ids, resume_texts)))
+    )
+    try:
+        return parse_packed_response(result_content, candidate_ids)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Packed response unusable ({e}); scoring one at a time")
+        return [single_score_fn(resume_text) for resume_text in resume_texts]
@@ -0,0 +1,191 @@
+import io
+import sys
+import time
+import types
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+import pdfplumber
+
+from config import EXTRACT_WORKERS
+from metrics import track_stage, observe_stage
+from text_cache import get_text_cache, make_text_key
+
+logger = logging.getLogger(__name__)
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+
+class _ExtractWorkerProcess(SpawnProcess):
+    # A spawned child re-runs the parent's __main__ before it does anything else.
+    # Under `streamlit run` that is the whole app script (page config, secrets,
+    # metrics server), so workers are started from a bare __main__ instead; they
+    # only ever run functions from this module.
+    def start(self):
+        main_module = sys.modules["__main__"]
+        bare_main = types.ModuleType("__main__")
+        sys.modules["__main__"] = bare_main
+        try:
+            super().start()
+        finally:
+            # Streamlit swaps __main__ on every rerun; don't undo one that raced us
+            if sys.modules.get("__main__") is bare_main:
+                sys.modules["__main__"] = main_module
+
+
+class _ExtractContext(SpawnContext):
+    Process = _ExtractWorkerProcess
+
+
+def _warm_worker():
+    # Pay pdfplumber's (and pdfminer's) import cost once per worker, not per PDF
+    import pdfplumber  # noqa: F401
+
+
+def parse_pdf(source, separator=" "):
+    # `source` is a path on disk, raw PDF bytes, or an open binary stream such as
+    # a Streamlit/FastAPI upload. Uploads are parsed straight from memory: no temp
+    # file is written, and streams and `bytes` are read in place without a copy.
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    with pdfplumber.open(source) as pdf:
+        return separator.join(page.extract_text() or "" for page in pdf.pages)
+
+
+def _pdf_bytes(source):
+    # The raw PDF bytes, used for the cache digest; avoids copying where possible
+    if isinstance(source, str):
+        with open(source, "rb") as pdf_file:
+            return pdf_file.read()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer()
+    source.seek(0)
+    return source.read()
+
+
+def _to_picklable(source):
+    if isinstance(source, (str, bytes)):
+        return source
+    return bytes(_pdf_bytes(source))
+
+
+def _parse_or_error(source, separator):
+    try:
+        return parse_pdf(source, separator)
+    except Exception as e:
+        return e
+
+
+def _timed_parse(source, separator, return_exceptions):
+    # Runs in the worker, so the parent records parse time without pool overhead
+    started = time.perf_counter()
+    parse = _parse_or_error if return_exceptions else parse_pdf
+    return parse(source, separator), time.perf_counter() - started
+
+
+def extract_pdf_text(source, separator=" "):
+    # Cached on disk by PDF digest, so reruns and other entry points skip pdfplumber
+    text_cache = get_text_cache()
+    cache_key = make_text_key(_pdf_bytes(source), separator)
+    text = text_cache.get(cache_key)
+    if text is None:
+        with track_stage("extract_pdf"):
+            text = parse_pdf(source, separator)
+        text_cache.put(cache_key, text)
+    return text
+
+
+def extract_pdf_text_pooled(source, separator=" "):
+    # Like extract_pdf_text, but a cache miss is parsed on the process pool. Lets
+    # servers extract many uploads from threads without contending for the GIL.
+    text_cache = get_text_cache()
+    cache_key = make_text_key(_pdf_bytes(source), separator)
+    text = text_cache.get(cache_key)
+    if text is None:
+        pool = get_extract_pool()
+        with track_stage("extract_pdf"):
+            try:
+                text = pool.submit(parse_pdf, _to_picklable(source), separator).result()
+            except BrokenProcessPool as e:
+                discard_extract_pool(pool, e)
+                text = parse_pdf(source, separator)
+        text_cache.put(cache_key, text)
+    return text
+
+
+def get_extract_pool():
+    # Started lazily and kept alive, so later batches reuse already-warm workers.
+    # Spawned, not forked, since the parent already runs Streamlit/uvicorn threads.
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                mp_context=_ExtractContext(),
+                initializer=_warm_worker,
+            )
+            logger.info(
+                f"Started PDF extraction pool with {_extract_pool._max_workers} workers"
+            )
+        return _extract_pool
+
+
+def discard_extract_pool(pool, error):
+    # A worker died (out of memory, a crashing PDF); the next batch gets a fresh
+    # pool and the caller falls back to parsing in-process
+    global _extract_pool
+    logger.warning(f"PDF extraction pool broke ({error}); extracting in-process")
+    with _extract_pool_lock:
+        if _extract_pool is pool:
+            _extract_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_pdf_texts(sources, separator=" ", return_exceptions=False):
+    # Extract many PDFs in parallel; texts come back in the same order as `sources`.
+    # With return_exceptions=True a failed PDF yields its exception instead of
+    # aborting the whole batch. Only PDFs missing from the text cache are parsed.
+    sources = list(sources)
+    text_cache = get_text_cache()
+    cache_keys = [make_text_key(_pdf_bytes(source), separator) for source in sources]
+    texts = [text_cache.get(cache_key) for cache_key in cache_keys]
+    missing = [i for i, text in enumerate(texts) if text is None]
+
+    if len(missing) <= 1:
+        # Not worth a round-trip to another process, and parses the buffer in place
+        parsed = [
+            _timed_parse(sources[i], separator, return_exceptions) for i in missing
+        ]
+    else:
+        # Workers need picklable input: paths stay paths, buffers go over as bytes
+        pool = get_extract_pool()
+        try:
+            parsed = list(
+                pool.map(
+                    _timed_parse,
+                    [_to_picklable(sources[i]) for i in missing],
+                    [separator] * len(missing),
+                    [return_exceptions] * len(missing),
+                )
+            )
+        except BrokenProcessPool as e:
+            discard_extract_pool(pool, e)
+            parsed = [
+                _timed_parse(sources[i], separator, return_exceptions)
+                for i in missing
+            ]
+
+    for i, (text, seconds) in zip(missing, parsed):
+        observe_stage("extract_pdf", seconds)
+        if not isinstance(text, Exception):
+            text_cache.put(cache_keys[i], text)
+        texts[i] = text
+    return texts
@@ -0,0 +1,77 @@
+import re
+from collections import Counter
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+from config import PREFILTER_MIN_SIMILARITY
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+STOP_WORDS = frozenset(
+    """
+    a about above after all also an and any are as at be been being both but by
+    can could did do does doing during each for from further had has have having
+    he her here hers him his how i if in into is it its itself just me more most
+    my no nor not of off on once only or other our ours out over own same she
+    should so some such than that the their theirs them then there these they
+    this those through to too under until up very was we were what when where
+    which while who whom why will with would you your yours
+    """.split()
+)
+
+
+def tokenize(text):
+    return [
+        token
+        for token in TOKEN_PATTERN.findall((text or "").lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def tfidf_similarities(resume_texts, job_description):
+    # Cosine similarity between each resume and the job description over
+    # sublinear TF-IDF vectors; IDF is fitted on this batch plus the job description.
+    documents = [tokenize(job_description)] + [tokenize(text) for text in resume_texts]
+    vocabulary = {}
+    rows, columns, counts = [], [], []
+    for row, tokens in enumerate(documents):
+        for term, count in Counter(tokens).items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+
+    term_counts = csr_matrix(
+        (np.asarray(counts, dtype=np.float64), (rows, columns)),
+        shape=(len(documents), max(len(vocabulary), 1)),
+    )
+    document_frequency = np.bincount(
+        term_counts.indices, minlength=term_counts.shape[1]
+    )
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+
+    term_counts.data = 1.0 + np.log(term_counts.data)
+    tfidf = csr_matrix(term_counts @ diags(idf))
+    norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    tfidf = csr_matrix(diags(1.0 / norms) @ tfidf)
+
+    return np.asarray((tfidf[1:] @ tfidf[0].T).todense()).ravel()
+
+
+def prefilter_resumes(
+    resume_texts, job_description, min_similarity=PREFILTER_MIN_SIMILARITY
+):
+    # Returns (similarities, keep) where keep marks the resumes worth an LLM call
+    similarities = tfidf_similarities(resume_texts, job_description)
+    return similarities, similarities >= min_similarity
+
+
+def prefilter_result(similarity, min_similarity):
+    # Written in the same "score\nexplanation" form as an LLM response, so the
+    # skipped resume lands in "rest" with its reason in the ZIP
+    return (
+        "0.0\n"
+        f"Skipped by keyword prefilter: similarity to the job description was "
+        f"{similarity:.3f}, below the {min_similarity:.3f} floor. No LLM call was made."
+    )
@@ -0,0 +1,131 @@
+from functools import lru_cache
+
+from langchain_core.messages import HumanMessage
+
+from config import MODEL, PROMPTS_MAPPING
+from tokens import count_tokens
+
+DIVIDER = "-----------------"
+
+INSTRUCTIONS = """\
+You are an Industrial-Organizational Psychologist who specializes in personnel selection and assessment. 
+Your discipline of study, Industrial-Organizational Psychology, would best prepare you to answer the 
+question or perform the task of determining a job fit score based on a resume and a job description. 
+"""
+
+
+def _job_context(job_description, high_fit_resume, low_fit_resume):
+    context = f"""
+Job Key Areas of Responsibility:
+{DIVIDER}
+{job_description}
+{DIVIDER}
+"""
+    if high_fit_resume:
+        context += f"""
+Example 'high-fit' resume with a score of 0.99 for reference:
+{DIVIDER}
+{high_fit_resume}
+{DIVIDER}
+"""
+    if low_fit_resume:
+        context += f"""
+Example 'low-fit' resume with a score of 0.10 for reference:
+{DIVIDER}
+{low_fit_resume}
+{DIVIDER}
+"""
+    return context
+
+
+class ScoringPrompt:
+    # The job-specific part of the prompt is identical for every resume in a batch,
+    # so it is built once and placed first; only the resume and closing
+    # instructions vary. A stable prefix also lets the provider's prompt cache hit.
+    def __init__(self, job_description, high_fit_resume, low_fit_resume, model=MODEL):
+        self.prefix = f"""\
+{INSTRUCTIONS}
+You will review the following job description and applicant resume and determine a job fit score as a float between 0 and 1 (Example: 0.75) and a short explanation for the score.
+{_job_context(job_description, high_fit_resume, low_fit_resume)}
+Applicant Resume:
+{DIVIDER}
+"""
+        self.suffix = f"""
+{DIVIDER}
+
+Remember, your task is to determine a job fit score as a float between 0 and 1 (Example: 0.99) and a short explanation for score.
+Respond with only the score and explanation. Do not include the resume or job description in your response.
+
+RESPONSE FORMAT:
+Job Fit Score: 
+Explanation:
+
+Job Fit Score:
+"""
+        self.prefix_tokens = count_tokens(self.prefix, model)
+        self.static_tokens = self.prefix_tokens + count_tokens(self.suffix, model)
+
+    def format(self, resume_text):
+        return f"{self.prefix}{resume_text}{self.suffix}"
+
+    def to_messages(self, resume_text):
+        return [HumanMessage(content=self.format(resume_text))]
+
+
+class PackedScoringPrompt:
+    # Same layout as ScoringPrompt, but the variable tail holds several candidates
+    def __init__(self, job_description, high_fit_resume, low_fit_resume, model=MODEL):
+        self.prefix = f"""\
+{INSTRUCTIONS}
+You will review each of the following applicant resumes independently against the job description and determine, for each one, a job fit score as a float between 0 and 1 (Example: 0.75) and a short explanation for the score.
+{_job_context(job_description, high_fit_resume, low_fit_resume)}
+Applicant Resumes:
+"""
+        self.suffix = """
+Remember, score every candidate on their own merits; do not rank them against each other.
+Respond with only a JSON array containing one object per candidate, in the same order, and nothing else.
+
+RESPONSE FORMAT:
+[{"id": "C1", "score": 0.75, "explanation": "..."}]
+"""
+        self.prefix_tokens = count_tokens(self.prefix, model)
+        self.static_tokens = self.prefix_tokens + count_tokens(self.suffix, model)
+
+    def format(self, candidates):
+        # `candidates` is a list of (candidate_id, resume_text)
+        applicants = "".join(
+            f"""
+Candidate {candidate_id}:
+{DIVIDER}
+{resume_text}
+{DIVIDER}
+"""
+            for candidate_id, resume_text in candidates
+        )
+        return f"{self.prefix}{applicants}{self.suffix}"
+
+    def to_messages(self, candidates):
+        return [HumanMessage(content=self.format(candidates))]
+
+
+@lru_cache(maxsize=32)
+def get_scoring_prompt(job_description, high_fit_resume, low_fit_resume, model=MODEL):
+    return ScoringPrompt(job_description, high_fit_resume, low_fit_resume, model)
+
+
+@lru_cache(maxsize=32)
+def get_packed_scoring_prompt(
+    job_description, high_fit_resume, low_fit_resume, model=MODEL
+):
+    return PackedScoringPrompt(job_description, high_fit_resume, low_fit_resume, model)
+
+
+def precompile_job_prompts(model=MODEL):
+    # Warm the cache for every configured posting so the first batch doesn't pay
+    for selected_prompts in PROMPTS_MAPPING.values():
+        get_scoring_prompt(
+            selected_prompts["job_description"],
+            selected_prompts["high_fit_resume"],
+            selected_prompts["low_fit_resume"],
+            model,
+        )
@@ -0,0 +1,36 @@
+from langchain_core.messages import HumanMessage
+
+
+def build_questions_prompt(resume_text, job_description):
+    return f"""\
+You are an Industrial/Organizational Psychologist who is preparing to analyze an applicant based on a job description and resume, 
+and create a selection of interview questions specific to the applicant in order to determine their potential success in the role.
+
+Applicant Resume:
+-----------------
+{resume_text}
+-----------------
+
+Job Key Areas of Responsibility:
+-----------------
+{job_description}
+-----------------
+
+Based on the job description and the information provided in the resume, please respond with an analysis of this applicant and a 
+selection of interview questions specific to this applicant and designed to understand better if this person will succeed in this role.
+
+Your Response Format:
+Applicant Name
+
+List of positive attributes for the position
+
+List of negative attributes for the position
+
+List of questions for the interview
+    """
+
+
+def build_questions_messages(resume_text, job_description):
+    # A plain message rather than a LangChain template, so braces in a resume
+    # can't break formatting
+    return [HumanMessage(content=build_questions_prompt(resume_text, job_description))]
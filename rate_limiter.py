@@ -0,0 +1,254 @@
+import re
+import json
+import time
+import threading
+
+from config import (
+    SCORE_COMPLETION_TOKENS,
+    RATE_LIMITS,
+    RATE_LIMIT_MIN_CONCURRENCY,
+    RATE_LIMIT_MAX_CONCURRENCY,
+    RATE_LIMIT_HEADROOM,
+)
+from metrics import RATE_LIMITED
+from tokens import count_tokens
+
+# How often a request waiting only for a free concurrency slot checks again
+SLOT_POLL_INTERVAL = 0.05
+# Pause after a 429 that carries no Retry-After or reset header
+DEFAULT_RETRY_AFTER = 1.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    # OpenAI reset headers look like "1s", "6m0s" or "20ms"
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers):
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    for name in (
+        "retry-after",
+        "x-ratelimit-reset-requests",
+        "x-ratelimit-reset-tokens",
+    ):
+        seconds = parse_duration(headers.get(name))
+        if seconds is not None:
+            return seconds
+    return DEFAULT_RETRY_AFTER
+
+
+def estimate_request(content):
+    # Returns (model, prompt + completion tokens) for a chat completions body
+    try:
+        body = json.loads(content)
+    except (TypeError, ValueError):
+        return None, 0
+    if not isinstance(body, dict):
+        return None, 0
+    model = body.get("model")
+    if not model:
+        return None, 0
+    prompt_tokens = sum(
+        count_tokens(message.get("content"), model)
+        for message in body.get("messages", [])
+        if isinstance(message.get("content"), str)
+    )
+    completion_tokens = body.get("max_tokens") or SCORE_COMPLETION_TOKENS
+    return model, prompt_tokens + completion_tokens
+
+
+class TokenBucket:
+    # Refills continuously at `capacity` per minute. A bucket with no known
+    # capacity never blocks until a response header tells us the limit.
+    def __init__(self, per_minute=None):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.capacity is not None:
+            self.level = min(
+                self.capacity,
+                self.level + (now - self.updated) * self.capacity / 60,
+            )
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        if self.capacity is None:
+            return 0.0
+        # A request bigger than the whole bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+    def take(self, amount):
+        if self.capacity is not None:
+            self.level -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+    def update(self, limit, remaining, now):
+        self._refill(now)
+        if limit:
+            if self.capacity is None:
+                self.level = limit
+            self.capacity = limit
+        # The provider's count wins when it has seen more usage than we have
+        if remaining is not None and self.level is not None:
+            self.level = min(self.level, remaining)
+
+    def headroom(self):
+        if not self.capacity:
+            return 1.0
+        return self.level / self.capacity
+
+
+class RateLimiter:
+    # Requests-per-minute and tokens-per-minute buckets for one model, plus an
+    # AIMD concurrency limit: it halves on every 429 and grows by roughly one
+    # slot per round of successful calls while the quota has headroom.
+    def __init__(
+        self,
+        model,
+        requests_per_minute=None,
+        tokens_per_minute=None,
+        min_concurrency=RATE_LIMIT_MIN_CONCURRENCY,
+        max_concurrency=RATE_LIMIT_MAX_CONCURRENCY,
+    ):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens):
+        # Takes a slot and returns 0.0, or returns how long to wait before trying again
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.blocked_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now),
+            )
+            if wait <= 0 and self.in_flight >= int(self.concurrency_limit):
+                wait = SLOT_POLL_INTERVAL
+            if wait > 0:
+                self.waited += wait
+                return wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self, tokens):
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def release(self, tokens, status_code, headers):
+        with self._lock:
+            now = time.monotonic()
+            self.in_flight -= 1
+            self.requests.update(
+                _header_int(headers, "x-ratelimit-limit-requests"),
+                _header_int(headers, "x-ratelimit-remaining-requests"),
+                now,
+            )
+            self.tokens.update(
+                _header_int(headers, "x-ratelimit-limit-tokens"),
+                _header_int(headers, "x-ratelimit-remaining-tokens"),
+                now,
+            )
+            if status_code == 429:
+                RATE_LIMITED.labels(self.model).inc()
+                self.throttled += 1
+                self.concurrency_limit = max(
+                    self.min_concurrency, self.concurrency_limit / 2
+                )
+                self.blocked_until = max(
+                    self.blocked_until, now + retry_after_seconds(headers)
+                )
+            elif status_code < 400:
+                headroom = min(self.requests.headroom(), self.tokens.headroom())
+                if headroom > RATE_LIMIT_HEADROOM:
+                    self.concurrency_limit = min(
+                        self.max_concurrency,
+                        self.concurrency_limit + 1 / self.concurrency_limit,
+                    )
+            else:
+                # Rejected before it ran, so it didn't use the quota we reserved
+                self.requests.refund(1)
+                self.tokens.refund(tokens)
+
+    def cancel(self, tokens):
+        # The request never got a response, e.g. the connection failed
+        with self._lock:
+            self.in_flight -= 1
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "concurrency_limit": int(self.concurrency_limit),
+                "in_flight": self.in_flight,
+                "requests_per_minute": self.requests.capacity,
+                "tokens_per_minute": self.tokens.capacity,
+                "throttled": self.throttled,
+                "seconds_waited": round(self.waited, 3),
+            }
+
+
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model):
+    with rate_limiters_lock:
+        rate_limiter = rate_limiters.get(model)
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(model, **RATE_LIMITS.get(model, {}))
+            rate_limiters[model] = rate_limiter
+        return rate_limiter
+
+
+def get_rate_limit_stats():
+    with rate_limiters_lock:
+        limiters = dict(rate_limiters)
+    return {model: rate_limiter.snapshot() for model, rate_limiter in limiters.items()}
@@ -0,0 +1,58 @@
+import hashlib
+import logging
+import threading
+
+from config import (
+    MODEL,
+    PROMPT_VERSION,
+    SCORE_CACHE_PATH,
+    SCORE_CACHE_MAX_ENTRIES,
+    SCORE_CACHE_MAX_AGE_DAYS,
+)
+from disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_score_key(
+    resume_text, job_description, high_fit_resume, low_fit_resume, model=MODEL
+):
+    # Everything that can change the LLM's answer goes into the key, so a new
+    # prompt version or model never serves a stale score.
+    digest = hashlib.sha256()
+    for part in (
+        PROMPT_VERSION,
+        model,
+        resume_text,
+        job_description,
+        high_fit_resume,
+        low_fit_resume,
+    ):
+        part_bytes = (part or "").encode("utf-8")
+        digest.update(len(part_bytes).to_bytes(8, "little"))
+        digest.update(part_bytes)
+    return digest.hexdigest()
+
+
+class ScoreCache(DiskCache):
+    def __init__(
+        self,
+        path=SCORE_CACHE_PATH,
+        max_entries=SCORE_CACHE_MAX_ENTRIES,
+        max_age_days=SCORE_CACHE_MAX_AGE_DAYS,
+    ):
+        super().__init__(path, "scores", max_entries, max_age_days)
+
+
+_score_cache = None
+_score_cache_lock = threading.Lock()
+
+
+def get_score_cache():
+    # One cache per process, shared by every session and scoring thread
+    global _score_cache
+    with _score_cache_lock:
+        if _score_cache is None:
+            _score_cache = ScoreCache()
+            logger.info(f"Opened score cache at {_score_cache.path}")
+        return _score_cache
@@ -0,0 +1,434 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+import numpy as np
+
+from config import (
+    MODEL,
+    MAX_IN_FLIGHT,
+    SCORE_COMPLETION_TOKENS,
+    CASCADE_MODEL,
+    CASCADE_MARGIN,
+    NEAR_DUPLICATE_MIN_SIMILARITY,
+)
+from context_fitting import fit_resume_to_budget, get_resume_budget
+from llm_client import get_chat_model
+from llm_retry import call_llm
+from metrics import DUPLICATE_RESUMES, NEAR_DUPLICATES_REUSED, track_stage
+from near_duplicates import describe_reuse, get_near_duplicate_index, make_job_key
+from packed_scoring import pack_resumes, score_resume_pack
+from prompt_templates import get_scoring_prompt
+from score_cache import get_score_cache, make_score_key
+from single_flight import SingleFlight
+from tokens import count_tokens
+from usage import TokenUsage, estimate_cost, submit_in_context
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("best", "good", "rest")
+
+# Identical scoring requests in flight at once (another session, API job or
+# thread) share a single LLM call
+score_flights = SingleFlight("score")
+
+
+# TODO: Switch to OpenAI function LLM call for more reliable response formatting - not an issue for now
+def score_resume(
+    resume_text,
+    job_description,
+    high_fit_resume,
+    low_fit_resume,
+    openai_api_key,
+    model=MODEL,
+):
+    print("Getting score...")
+    llm = get_chat_model(model, openai_api_key)
+    # Built once per job; only the resume is filled in per call
+    with track_stage("build_prompt"):
+        prompt = get_scoring_prompt(
+            job_description, high_fit_resume, low_fit_resume, model
+        )
+    with track_stage("fit_context"):
+        resume_text = fit_resume_to_budget(resume_text, prompt, openai_api_key, model)
+    with track_stage("build_prompt"):
+        messages = prompt.to_messages(resume_text)
+    return call_llm(llm, messages)
+
+
+def parse_score_and_explanation(result_content):
+    with track_stage("parse_score"):
+        return _parse_score_and_explanation(result_content)
+
+
+def _parse_score_and_explanation(result_content):
+    # Assuming the score and explanation are on separate lines
+    lines = result_content.split("\n")
+    score = float(lines[0])  # Assuming the score is on the first line
+    explanation = lines[1] if len(lines) > 1 else ""  # Explanation on the second line
+    return score, explanation
+
+
+def categorize_score(score, threshold1, threshold2):
+    if score > threshold1:
+        return "best"
+    elif score > threshold2:
+        return "good"
+    else:
+        return "rest"
+
+
+def categorize_scores(scores, threshold1, threshold2):
+    # Vectorized categorize_score over a float array: indices into CATEGORIES.
+    # NaN (unscored) compares false everywhere and lands in "rest".
+    scores = np.asarray(scores, dtype=float)
+    return np.where(scores > threshold1, 0, np.where(scores > threshold2, 1, 2))
+
+
+def is_borderline(score, threshold1, threshold2, margin):
+    # Close enough to a category boundary that a stronger model could flip it
+    return abs(score - threshold1) <= margin or abs(score - threshold2) <= margin
+
+
+def score_resumes_concurrently(
+    resume_texts, score_fn, max_in_flight=MAX_IN_FLIGHT, on_progress=None
+):
+    # Every LLM call is independent, so run them on a bounded thread pool but
+    # yield (index, result) strictly in input order. That keeps the ZIP layout and
+    # categorization identical to a serial run. `on_progress(completed, total)` is
+    # called from the consuming thread, so it is safe to touch Streamlit from it.
+    total = len(resume_texts)
+    executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight))
+    try:
+        futures = {
+            submit_in_context(executor, score_fn, resume_text): i
+            for i, resume_text in enumerate(resume_texts)
+        }
+        pending = set(futures)
+        results = {}
+        next_index = 0
+        while next_index < total:
+            if next_index not in results:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+                if on_progress:
+                    on_progress(len(futures) - len(pending), total)
+            while next_index in results:
+                yield next_index, results.pop(next_index)
+                next_index += 1
+    finally:
+        # Stopping early (or an error) should not leave queued calls running
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_cached_score(
+    resume_text,
+    job_description,
+    high_fit_resume,
+    low_fit_resume,
+    openai_api_key,
+    model=MODEL,
+    reuse_near_duplicates=False,
+):
+    # Scores persist on disk across sessions and restarts
+    score_cache = get_score_cache()
+    cache_key = make_score_key(
+        resume_text, job_description, high_fit_resume, low_fit_resume, model
+    )
+    result_content = score_cache.get(cache_key)
+    if result_content is not None:
+        return result_content
+
+    near_duplicate_index = get_near_duplicate_index()
+    job_key = make_job_key(job_description, high_fit_resume, low_fit_resume, model)
+
+    def score_and_cache():
+        # A flight that finished between the lookup above and this one becoming
+        # the leader has already cached the score
+        result_content = score_cache.get(cache_key, count=False)
+        if result_content is not None:
+            return result_content
+        if reuse_near_duplicates:
+            reused_content = find_near_duplicate_score(
+                near_duplicate_index, resume_text, job_key
+            )
+            if reused_content is not None:
+                return reused_content
+        result_content = score_resume(
+            resume_text,
+            job_description,
+            high_fit_resume,
+            low_fit_resume,
+            openai_api_key,
+            model,
+        )
+        if cache_result(score_cache, cache_key, result_content):
+            near_duplicate_index.add(resume_text, job_key, result_content)
+        return result_content
+
+    # A caller that won't accept a reused score must not share one that is
+    return score_flights.do((cache_key, reuse_near_duplicates), score_and_cache)
+
+
+def find_near_duplicate_score(near_duplicate_index, resume_text, job_key):
+    # The score of a near-identical resume already scored for this job, with the
+    # match noted after it, or None. Never cached under this resume's own key, so
+    # switching reuse off scores it afresh.
+    match = near_duplicate_index.find(
+        resume_text, job_key, NEAR_DUPLICATE_MIN_SIMILARITY
+    )
+    if match is None:
+        return None
+    NEAR_DUPLICATES_REUSED.inc()
+    return describe_reuse(match)
+
+
+def score_or_error(score_fn, *args, **kwargs):
+    # A resume that still fails after retries is returned as its exception, so a
+    # batch reports it and carries on instead of aborting
+    try:
+        return score_fn(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Scoring failed: {e}")
+        return e
+
+
+def score_resumes_deduplicated(
+    resume_texts, score_fn, max_in_flight=MAX_IN_FLIGHT, on_progress=None
+):
+    # Like score_resumes_concurrently, but identical resume texts (the same PDF
+    # uploaded twice, overlapping job board exports) are scored once and the
+    # result is fanned out to every copy. The text itself is the dict key, so
+    # this is a hash lookup and holds no extra copies.
+    unique_positions = {}
+    positions = [
+        unique_positions.setdefault(resume_text, len(unique_positions))
+        for resume_text in resume_texts
+    ]
+    duplicate_count = len(resume_texts) - len(unique_positions)
+    if duplicate_count:
+        DUPLICATE_RESUMES.inc(duplicate_count)
+        logger.info(f"Scoring {len(unique_positions)} unique of {len(resume_texts)}")
+
+    results = {}
+    next_index = 0
+    for unique_position, result in score_resumes_concurrently(
+        list(unique_positions), score_fn, max_in_flight, on_progress
+    ):
+        results[unique_position] = result
+        # Unique texts are numbered by first appearance, so every input up to the
+        # next unseen text is ready
+        while next_index < len(positions) and positions[next_index] in results:
+            yield next_index, results[positions[next_index]]
+            next_index += 1
+
+
+def escalate_if_borderline(
+    resume_text,
+    result_content,
+    job_description,
+    high_fit_resume,
+    low_fit_resume,
+    threshold1,
+    threshold2,
+    openai_api_key,
+):
+    # Cascade: keep the fast model's answer unless it sits near a category
+    # boundary (or can't be parsed), then ask the stronger model instead
+    try:
+        score, _ = parse_score_and_explanation(result_content)
+    except ValueError:
+        score = None
+    if score is not None and not is_borderline(
+        score, threshold1, threshold2, CASCADE_MARGIN
+    ):
+        return result_content
+
+    strong_result_content = get_cached_score(
+        resume_text,
+        job_description,
+        high_fit_resume,
+        low_fit_resume,
+        openai_api_key,
+        CASCADE_MODEL,
+    )
+    first_pass = f"{score:.2f}" if score is not None else "unreadable"
+    return (
+        f"{strong_result_content.rstrip()}\n\n"
+        f"Re-scored with {CASCADE_MODEL}; the {MODEL} score ({first_pass}) was "
+        f"within {CASCADE_MARGIN} of a category threshold."
+    )
+
+
+def cache_result(score_cache, cache_key, result_content):
+    # Only cache responses we can parse, so a malformed answer gets retried
+    try:
+        parse_score_and_explanation(result_content)
+    except ValueError:
+        return False
+    score_cache.put(cache_key, result_content)
+    return True
+
+
+def get_scores_packed(
+    resume_texts,
+    job_description,
+    high_fit_resume,
+    low_fit_resume,
+    openai_api_key,
+    on_progress=None,
+    escalate=None,
+    max_in_flight=MAX_IN_FLIGHT,
+    reuse_near_duplicates=False,
+):
+    # Like running get_cached_score over every resume, but cache misses are scored several
+    # per LLM call so the job description and examples are only sent once per pack.
+    # Yields (index, result_content) in upload order.
+    score_cache = get_score_cache()
+    near_duplicate_index = get_near_duplicate_index()
+    job_key = make_job_key(job_description, high_fit_resume, low_fit_resume)
+    cache_keys = [
+        make_score_key(resume_text, job_description, high_fit_resume, low_fit_resume)
+        for resume_text in resume_texts
+    ]
+    cached_results = {}
+    missing = []
+    # A resume repeated in the batch is packed once; copies take the first's result
+    first_missing = {}
+    copies = {}
+    for i, cache_key in enumerate(cache_keys):
+        result_content = score_cache.get(cache_key)
+        if result_content is not None:
+            cached_results[i] = result_content
+        elif cache_key in first_missing:
+            copies.setdefault(first_missing[cache_key], []).append(i)
+        else:
+            first_missing[cache_key] = i
+            missing.append(i)
+    if copies:
+        DUPLICATE_RESUMES.inc(sum(len(indices) for indices in copies.values()))
+    if reuse_near_duplicates:
+        # Reused scores are handled like cached ones and never reach a pack
+        still_missing = []
+        for i in missing:
+            reused_content = find_near_duplicate_score(
+                near_duplicate_index, resume_texts[i], job_key
+            )
+            if reused_content is None:
+                still_missing.append(i)
+            else:
+                cached_results[i] = reused_content
+        missing = still_missing
+
+    packs = [
+        [missing[j] for j in pack]
+        for pack in pack_resumes(
+            [resume_texts[i] for i in missing],
+            job_description,
+            high_fit_resume,
+            low_fit_resume,
+        )
+    ]
+    # Cached resumes still go through the pool so a cascade can escalate them
+    # concurrently with the packs
+    work = sorted(packs + [[i] for i in cached_results], key=lambda pack: pack[0])
+    # Resumes that fall back to single calls fail one at a time, not as a pack
+    single_score_fn = partial(
+        score_or_error,
+        get_cached_score,
+        job_description=job_description,
+        high_fit_resume=high_fit_resume,
+        low_fit_resume=low_fit_resume,
+        openai_api_key=openai_api_key,
+    )
+
+    def score_pack(pack):
+        # A pack that still fails after retries comes back as the exception for
+        # each of its resumes, so the caller reports them and the batch goes on
+        pack_texts = [resume_texts[i] for i in pack]
+        if pack[0] in cached_results:
+            pack_results = [cached_results[pack[0]]]
+        else:
+            pack_results = score_or_error(
+                score_resume_pack,
+                pack_texts,
+                job_description,
+                high_fit_resume,
+                low_fit_resume,
+                openai_api_key,
+                single_score_fn,
+            )
+            if isinstance(pack_results, Exception):
+                return [pack_results] * len(pack)
+            for i, result_content in zip(pack, pack_results):
+                if isinstance(result_content, Exception):
+                    continue
+                if cache_result(score_cache, cache_keys[i], result_content):
+                    near_duplicate_index.add(resume_texts[i], job_key, result_content)
+        if escalate:
+            pack_results = [
+                result_content
+                if isinstance(result_content, Exception)
+                else score_or_error(escalate, resume_text, result_content)
+                for resume_text, result_content in zip(pack_texts, pack_results)
+            ]
+        return pack_results
+
+    results = {}
+    next_index = 0
+    for work_index, pack_results in score_resumes_concurrently(
+        work, score_pack, max_in_flight, on_progress=on_progress
+    ):
+        for i, result_content in zip(work[work_index], pack_results):
+            results[i] = result_content
+            for copy_index in copies.get(i, ()):
+                results[copy_index] = result_content
+        while next_index in results:
+            yield next_index, results.pop(next_index)
+            next_index += 1
+
+
+def merge_prefilled_results(scored_resumes, scored_indices, prefilled_results):
+    # `scored_resumes` yields (position, result_content) over `scored_indices`;
+    # interleave the `prefilled_results` so everything comes out in upload order
+    ready = dict(prefilled_results)
+    next_index = 0
+    for position, result_content in scored_resumes:
+        ready[scored_indices[position]] = result_content
+        while next_index in ready:
+            yield next_index, ready.pop(next_index)
+            next_index += 1
+    while next_index in ready:
+        yield next_index, ready.pop(next_index)
+        next_index += 1
+
+
+def check_prompt_fits(
+    job_description, high_fit_resume, low_fit_resume, model=MODEL
+):
+    # Raises ValueError before any work starts if the job description and examples
+    # alone fill the model's context
+    prompt = get_scoring_prompt(job_description, high_fit_resume, low_fit_resume, model)
+    get_resume_budget(prompt, model)
+
+
+def estimate_batch_usage(
+    resume_texts, job_description, high_fit_resume, low_fit_resume, model=MODEL
+):
+    # Pre-flight upper bound for scoring `resume_texts` with one call each: the
+    # full prompt plus the reserved completion. Resumes over the context budget
+    # are counted at the budget; the summarization calls they need are not included.
+    prompt = get_scoring_prompt(job_description, high_fit_resume, low_fit_resume, model)
+    budget = get_resume_budget(prompt, model)
+    estimate = TokenUsage()
+    for resume_text in resume_texts:
+        prompt_tokens = prompt.static_tokens + min(
+            count_tokens(resume_text, model), budget
+        )
+        estimate.add(
+            prompt_tokens,
+            SCORE_COMPLETION_TOKENS,
+            estimate_cost(model, prompt_tokens, SCORE_COMPLETION_TOKENS),
+        )
+    return estimate
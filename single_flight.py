@@ -0,0 +1,38 @@
+import threading
+from concurrent.futures import Future
+
+from metrics import SINGLE_FLIGHT_SHARED
+
+
+class SingleFlight:
+    # Coalesces concurrent calls with the same key: the first caller runs `fn`,
+    # everyone arriving while it is in flight waits for and shares its result
+    # (or its exception). Nothing is remembered once the call finishes; that is
+    # the caches' job.
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            SINGLE_FLIGHT_SHARED.labels(self.name).inc()
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,50 @@
+import hashlib
+import logging
+import threading
+
+import pdfplumber
+
+from config import (
+    EXTRACTOR_VERSION,
+    TEXT_CACHE_PATH,
+    TEXT_CACHE_MAX_ENTRIES,
+    TEXT_CACHE_MAX_AGE_DAYS,
+)
+from disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_text_key(pdf_bytes, separator=" "):
+    # blake2b is much faster than sha256 on multi-megabyte PDFs. The extractor
+    # and pdfplumber versions are part of the key so upgrades re-extract.
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(
+        f"{EXTRACTOR_VERSION}:{pdfplumber.__version__}:{separator!r}:".encode("utf-8")
+    )
+    digest.update(pdf_bytes)
+    return digest.hexdigest()
+
+
+class TextCache(DiskCache):
+    def __init__(
+        self,
+        path=TEXT_CACHE_PATH,
+        max_entries=TEXT_CACHE_MAX_ENTRIES,
+        max_age_days=TEXT_CACHE_MAX_AGE_DAYS,
+    ):
+        super().__init__(path, "texts", max_entries, max_age_days)
+
+
+_text_cache = None
+_text_cache_lock = threading.Lock()
+
+
+def get_text_cache():
+    # One cache per process, shared by the Streamlit apps, APIs and CLI tools
+    global _text_cache
+    with _text_cache_lock:
+        if _text_cache is None:
+            _text_cache = TextCache()
+            logger.info(f"Opened text cache at {_text_cache.path}")
+        return _text_cache
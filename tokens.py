@@ -0,0 +1,37 @@
+from functools import lru_cache
+
+import tiktoken
+
+from config import MODEL, MODEL_CONTEXT_WINDOWS
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model=MODEL):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Unknown to this tiktoken release; every chat model we use is cl100k
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text, model=MODEL):
+    return len(get_encoding(model).encode(text or "", disallowed_special=()))
+
+
+def get_context_window(model=MODEL):
+    return MODEL_CONTEXT_WINDOWS.get(model, 4096)
+
+
+def split_by_tokens(text, chunk_tokens, model=MODEL):
+    encoding = get_encoding(model)
+    token_ids = encoding.encode(text or "", disallowed_special=())
+    return [
+        encoding.decode(token_ids[start : start + chunk_tokens])
+        for start in range(0, len(token_ids), chunk_tokens)
+    ]
+
+
+def truncate_to_tokens(text, max_tokens, model=MODEL):
+    encoding = get_encoding(model)
+    token_ids = encoding.encode(text or "", disallowed_special=())
+    return encoding.decode(token_ids[:max_tokens])
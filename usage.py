@@ -0,0 +1,116 @@
+import io
+import csv
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+from config import MODEL_PRICES
+from metrics import LLM_COST, LLM_TOKENS
+
+# Every TokenUsage a call should be added to (e.g. the resume and its batch),
+# plus the job posting the Prometheus counters are labelled with
+_active_usage = ContextVar("active_usage", default=())
+_active_job = ContextVar("active_job", default="")
+
+USAGE_COLUMNS = ("calls", "prompt_tokens", "completion_tokens", "total_tokens", "cost")
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class TokenUsage:
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, prompt_tokens, completion_tokens, cost):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += cost
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "cost": round(self.cost, 6),
+            }
+
+
+@contextmanager
+def track_usage(job=None):
+    # Collects the usage of every LLM call made inside the block, including calls
+    # on pools that were submitted with `submit_in_context`. Blocks nest: a call
+    # counts towards the resume and the batch around it.
+    usage = TokenUsage()
+    usage_token = _active_usage.set(_active_usage.get() + (usage,))
+    job_token = _active_job.set(job) if job is not None else None
+    try:
+        yield usage
+    finally:
+        if job_token is not None:
+            _active_job.reset(job_token)
+        _active_usage.reset(usage_token)
+
+
+def record_usage(model, prompt_tokens, completion_tokens):
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    for usage in _active_usage.get():
+        usage.add(prompt_tokens, completion_tokens, cost)
+    job = _active_job.get()
+    LLM_TOKENS.labels(model, job, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(model, job, "completion").inc(completion_tokens)
+    LLM_COST.labels(model, job).inc(cost)
+
+
+def with_usage(fn):
+    # Wraps a per-resume function so it returns (result, TokenUsage of its calls)
+    def wrapper(*args, **kwargs):
+        with track_usage() as usage:
+            result = fn(*args, **kwargs)
+        return result, usage
+
+    return wrapper
+
+
+def collect_usage(scored_resumes, usage_by_position):
+    # Unwraps (position, (result, usage)) pairs from a `with_usage` score function,
+    # filling `usage_by_position` as results come in. Deduplicated copies share
+    # one result; only the first is charged, the rest made no calls of their own.
+    charged = set()
+    for position, (result, usage) in scored_resumes:
+        if id(usage) in charged:
+            usage = TokenUsage()
+        charged.add(id(usage))
+        usage_by_position[position] = usage
+        yield position, result
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    # Pool threads don't inherit context variables; carry the caller's over so
+    # usage recorded on the worker lands in the caller's track_usage blocks
+    return executor.submit(copy_context().run, fn, *args, **kwargs)
+
+
+def usage_csv(resume_names, usage_by_index, batch_usage):
+    # One row per resume with tracked usage (cache hits show zero calls), then
+    # the batch total, which also covers calls not tied to a single resume
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["resume", *USAGE_COLUMNS])
+    for i, resume_name in enumerate(resume_names):
+        if i in usage_by_index:
+            totals = usage_by_index[i].to_dict()
+            writer.writerow([resume_name, *(totals[name] for name in USAGE_COLUMNS)])
+    totals = batch_usage.to_dict()
+    writer.writerow(["TOTAL", *(totals[name] for name in USAGE_COLUMNS)])
+    return output.getvalue()